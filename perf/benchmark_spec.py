@@ -0,0 +1,88 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Typed descriptions of the objects that the generated scripts construct, e.g., estimators,
+constraints and mitigators, which are rendered into source code by the script generation.
+"""
+
+import inspect
+
+
+class Source:
+    """Source is a piece of code that is rendered as is, e.g., the name of a variable in the
+    generated script that is passed as an argument.
+    """
+
+    def __init__(self, code):
+        self.code = code
+
+    def __repr__(self):
+        return self.code
+
+    def __eq__(self, other):
+        return isinstance(other, Source) and self.code == other.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+
+class CallSpec:
+    """CallSpec describes a call of a class or function with typed arguments and renders it
+    as source code for the generated scripts.
+
+    Arguments are rendered with `repr`, so they can be literals, nested CallSpecs or Source
+    objects that refer to variables of the generated script.
+
+    svc = CallSpec("SVC", "sklearn.svm", C=1.0)
+    svc.to_source()  # "SVC(C=1.0)"
+    svc.import_line  # "from sklearn.svm import SVC"
+    """
+
+    def __init__(self, name, module, **params):
+        self.name = name
+        self.module = module
+        self.params = params
+
+    @property
+    def import_line(self):
+        return "from {} import {}".format(self.module, self.name)
+
+    @property
+    def import_lines(self):
+        """Return the import lines of this call and of all nested calls."""
+        import_lines = [self.import_line]
+        for value in self.params.values():
+            if isinstance(value, CallSpec):
+                import_lines.extend(value.import_lines)
+        return import_lines
+
+    def with_params(self, **params):
+        """Return a copy with the given arguments added or replaced."""
+        return CallSpec(self.name, self.module, **dict(self.params, **params))
+
+    def validate(self, callable_):
+        """Raise a ValueError if `callable_` doesn't accept the arguments of this call, e.g.,
+        because a hyperparameter was renamed in the installed version of a package.
+        """
+        parameters = inspect.signature(callable_).parameters
+        if any(parameter.kind == inspect.Parameter.VAR_KEYWORD
+               for parameter in parameters.values()):
+            return
+        unknown_params = sorted(set(self.params) - set(parameters))
+        if unknown_params:
+            raise ValueError("{} doesn't accept the argument(s) {}."
+                             .format(self.name, ", ".join(unknown_params)))
+
+    def to_source(self):
+        arguments = ", ".join("{}={!r}".format(key, value) for key, value in self.params.items())
+        return "{}({})".format(self.name, arguments)
+
+    def __repr__(self):
+        return self.to_source()
+
+    def __eq__(self, other):
+        return isinstance(other, CallSpec) and \
+            (self.name, self.module, self.params) == (other.name, other.module, other.params)
+
+    def __hash__(self):
+        return hash((self.name, self.module, tuple(sorted(self.params))))
@@ -0,0 +1,162 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Performance budgets, i.e., upper bounds on metrics such as the mitigation time, the peak
+memory and the overhead ratio per configuration, which are stored in a versioned JSON file:
+
+{
+    "version": 3,
+    "tolerance": 0.1,
+    "budgets": {
+        "<configuration>": {"mitigation_execution_time": 12.5, ...},
+        ...
+    }
+}
+
+A measurement violates its budget if it exceeds the budget by more than the relative
+tolerance, which absorbs the noise between runs.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from statistics import median
+
+from results_store import ResultsStore
+
+DEFAULT_BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+
+# the metrics for which budgets are proposed; lower values are better for all of them
+BUDGETED_METRICS = [
+    "estimator_fit_execution_time",
+    "mitigation_execution_time",
+    "mitigation_peak_rss",
+    "mitigation_time_overhead_relative",
+]
+
+
+class BudgetViolation:
+    def __init__(self, configuration, metric, value, budget, tolerance):
+        self.configuration = configuration
+        self.metric = metric
+        self.value = value
+        self.budget = budget
+        self.tolerance = tolerance
+
+    def __repr__(self):
+        return "{} {}: {:.6g} exceeds the budget of {:.6g} by {:+.1%} (tolerance {:.0%})" \
+               .format(self.configuration, self.metric, self.value, self.budget,
+                       self.value / self.budget - 1, self.tolerance)
+
+
+class Budgets:
+    def __init__(self, budgets=None, tolerance=0.1, version=0):
+        self.budgets = budgets if budgets is not None else {}
+        self.tolerance = tolerance
+        self.version = version
+
+    @classmethod
+    def load(cls, path=DEFAULT_BUDGETS_FILE):
+        with open(path, 'r') as budgets_file:
+            content = json.load(budgets_file)
+        return cls(content.get("budgets", {}), content.get("tolerance", 0.1),
+                   content.get("version", 0))
+
+    def save(self, path=DEFAULT_BUDGETS_FILE):
+        content = {"version": self.version, "tolerance": self.tolerance,
+                   "budgets": {configuration: dict(sorted(metric_budgets.items()))
+                               for configuration, metric_budgets
+                               in sorted(self.budgets.items())}}
+        with open(path, 'w') as budgets_file:
+            json.dump(content, budgets_file, indent=4)
+            budgets_file.write("\n")
+
+    def check(self, configuration, metrics, tolerance=None):
+        """Return a `BudgetViolation` for every budgeted metric of the configuration that
+        exceeds its budget by more than the tolerance. Metrics that weren't measured, e.g.,
+        because a phase was disabled, are skipped.
+        """
+        if tolerance is None:
+            tolerance = self.tolerance
+        violations = []
+        for metric, budget in sorted(self.budgets.get(configuration, {}).items()):
+            value = metrics.get(metric)
+            if isinstance(value, list):
+                value = median(value) if value else None
+            if value is None:
+                continue
+            if value > budget * (1 + tolerance):
+                violations.append(BudgetViolation(configuration, metric, value, budget,
+                                                  tolerance))
+        return violations
+
+
+def propose_budgets(results_store, history=5, headroom=0.2, metrics=None):
+    """Propose budgets from the latest `history` recorded commits: every budget is the
+    largest per-commit median of the metric with `headroom` on top, rounded up to three
+    significant digits.
+    """
+    if metrics is None:
+        metrics = BUDGETED_METRICS
+    medians = {}
+    for commit in results_store.get_commits()[-history:]:
+        for (configuration, metric), values in results_store.get_values(commit).items():
+            if metric in metrics:
+                medians.setdefault(configuration, {}).setdefault(metric, []) \
+                    .append(median(values))
+    return {configuration: {metric: _round_up(max(commit_medians) * (1 + headroom))
+                            for metric, commit_medians in metric_medians.items()}
+            for configuration, metric_medians in medians.items()}
+
+
+def _round_up(value, significant_digits=3):
+    if value <= 0:
+        return value
+    scale = 10 ** (math.floor(math.log10(value)) - significant_digits + 1)
+    # rounding removes floating point noise such as 12.500000000000002
+    return round(math.ceil(value / scale) * scale, 12)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Propose performance budgets from the recent history in the locally "
+                    "stored performance test results and optionally update the budgets file.")
+    parser.add_argument("--database", default=os.path.join("perf", "results.sqlite"))
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS_FILE)
+    parser.add_argument("--history", type=int, default=5,
+                        help="number of most recently recorded commits to consider")
+    parser.add_argument("--headroom", type=float, default=0.2,
+                        help="relative margin on top of the largest recent median")
+    parser.add_argument("--write", action="store_true",
+                        help="write the proposed budgets and increment the version")
+    args = parser.parse_args(args)
+
+    budgets = Budgets.load(args.budgets) if os.path.exists(args.budgets) else Budgets()
+    results_store = ResultsStore(args.database)
+    proposed_budgets = propose_budgets(results_store, args.history, args.headroom)
+    results_store.close()
+    if not proposed_budgets:
+        print("No results found in {}.".format(args.database))
+        return 2
+
+    for configuration, metric_budgets in sorted(proposed_budgets.items()):
+        print(configuration)
+        for metric, budget in sorted(metric_budgets.items()):
+            current_budget = budgets.budgets.get(configuration, {}).get(metric)
+            current_budget = "none" if current_budget is None \
+                else "{:.6g}".format(current_budget)
+            print("    {}: {} -> {:.6g}".format(metric, current_budget, budget))
+
+    if args.write:
+        for configuration, metric_budgets in proposed_budgets.items():
+            budgets.budgets.setdefault(configuration, {}).update(metric_budgets)
+        budgets.version += 1
+        budgets.save(args.budgets)
+        print("Wrote version {} of the budgets to {}".format(budgets.version, args.budgets))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,21 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+import os
 import pytest
 
 from fairlearn.postprocessing import ThresholdOptimizer
 from fairlearn.reductions import ExponentiatedGradient, GridSearch
 
+from benchmark_spec import CallSpec
+from budgets import Budgets
 from workspace import get_workspace
-from environment_setup import build_package
+from environment_setup import DEFAULT_WHEEL_CACHE_DIRECTORY, LocalWheelCache, build_package
+from hyperparameter_sampling import Axis, LATIN_HYPERCUBE, SAMPLING_METHODS, sample_hyperparameters
+from local_execution import LocalExecutionEngine
+from profiled_execution import PROFILERS
+from results_store import ResultsStore, get_fairlearn_commit
+from synthetic_dataset import get_base_dataset, get_scalability_datasets
 
 
 THRESHOLD_OPTIMIZER = ThresholdOptimizer.__name__
@@ -20,52 +28,286 @@ TIME = "time"
 ADULT_UCI = 'adult_uci'
 COMPAS = 'compas'
 
-RBM_SVM = 'SVC()'
-DECISION_TREE_CLASSIFIER = 'DecisionTreeClassifier()'
+RBM_SVM = CallSpec("SVC", "sklearn.svm")
+DECISION_TREE_CLASSIFIER = CallSpec("DecisionTreeClassifier", "sklearn.tree")
+RANDOM_FOREST_CLASSIFIER = CallSpec("RandomForestClassifier", "sklearn.ensemble")
+HIST_GRADIENT_BOOSTING_CLASSIFIER = CallSpec("HistGradientBoostingClassifier",
+                                             "sklearn.ensemble")
+LOGISTIC_REGRESSION = CallSpec("LogisticRegression", "sklearn.linear_model")
+
+# ThresholdOptimizer expects the name of the constraints whereas the reductions expect
+# Moment objects
+POSTPROCESSING_DISPARITY_METRICS = ['equalized_odds', 'demographic_parity']
+EQUALIZED_ODDS = CallSpec("EqualizedOdds", "fairlearn.reductions")
+DEMOGRAPHIC_PARITY = CallSpec("DemographicParity", "fairlearn.reductions")
+ERROR_RATE_PARITY = CallSpec("ErrorRateParity", "fairlearn.reductions")
+FALSE_POSITIVE_RATE_PARITY = CallSpec("FalsePositiveRateParity", "fairlearn.reductions")
+TRUE_POSITIVE_RATE_PARITY = CallSpec("TruePositiveRateParity", "fairlearn.reductions")
+REDUCTIONS_DISPARITY_METRICS = [EQUALIZED_ODDS, DEMOGRAPHIC_PARITY, ERROR_RATE_PARITY,
+                                FALSE_POSITIVE_RATE_PARITY, TRUE_POSITIVE_RATE_PARITY]
 
 DATASETS = [ADULT_UCI, COMPAS]
 ESTIMATORS = [RBM_SVM, DECISION_TREE_CLASSIFIER]
 MITIGATORS = [THRESHOLD_OPTIMIZER, EXPONENTIATED_GRADIENT, GRID_SEARCH]
 
+# Estimators that use several cores. The random forest parallelizes over trees with joblib
+# and needs n_jobs, whereas the others use OpenMP or BLAS threads, which are limited per run.
+MULTICORE_ESTIMATORS = [RANDOM_FOREST_CLASSIFIER, HIST_GRADIENT_BOOSTING_CLASSIFIER,
+                        LOGISTIC_REGRESSION]
+_N_JOBS_ESTIMATORS = [RANDOM_FOREST_CLASSIFIER]
+
+# Hyperparameter axes of the reductions. Besides the constructor arguments the number of
+# constraints is varied through the number of sensitive feature groups of a synthetic dataset
+# and the disparity metric, since equalized odds has twice as many constraints as demographic
+# parity.
+N_GROUPS = "n_groups"
+DISPARITY_METRIC = "disparity_metric"
+_CONSTRAINT_AXES = [Axis(N_GROUPS, [2, 4, 8, 16, 32], 2),
+                    Axis(DISPARITY_METRIC, [DEMOGRAPHIC_PARITY, EQUALIZED_ODDS],
+                         DEMOGRAPHIC_PARITY)]
+HYPERPARAMETER_AXES = {
+    EXPONENTIATED_GRADIENT: [Axis("eps", [0.001, 0.005, 0.01, 0.05, 0.1], 0.01),
+                             Axis("max_iter", [10, 25, 50, 100, 200], 50),
+                             Axis("nu", [None, 1e-6, 1e-4, 1e-2], None)] + _CONSTRAINT_AXES,
+    GRID_SEARCH: [Axis("grid_size", [5, 10, 20, 50, 100, 200], 10)] + _CONSTRAINT_AXES
+}
+
 
 class PerfTestConfiguration:
-    def __init__(self, dataset, estimator, mitigator, disparity_metric):
+    """PerfTestConfiguration describes a single performance test.
+
+    The estimator and the reductions' disparity metrics are `CallSpec` objects, the
+    ThresholdOptimizer's disparity metric is the name of its constraints, and
+    `mitigator_params` holds typed hyperparameters that are passed to the mitigator's
+    constructor, e.g., `{"grid_size": 20}`. If `n_threads` is set, the OpenMP and BLAS
+    thread pools of the run are limited to that many threads.
+    """
+
+    def __init__(self, dataset, estimator, mitigator, disparity_metric, mitigator_params=None,
+                 n_threads=None):
         self.dataset = dataset
         self.estimator = estimator
         self.mitigator = mitigator
         self.disparity_metric = disparity_metric
+        self.mitigator_params = mitigator_params if mitigator_params is not None else {}
+        self.n_threads = n_threads
 
     def __repr__(self):
-        return "[dataset: {}, estimator: {}, mitigator: {}, disparity_metric: {}]" \
-               .format(self.dataset, self.estimator, self.mitigator, self.disparity_metric)
+        description = "[dataset: {}, estimator: {!r}, mitigator: {}, disparity_metric: {!r}" \
+                      .format(self.dataset, self.estimator, self.mitigator,
+                              self.disparity_metric)
+        if self.mitigator_params:
+            description += ", mitigator_params: {}".format(
+                ",".join("{}={!r}".format(key, value)
+                         for key, value in sorted(self.mitigator_params.items())))
+        if self.n_threads is not None:
+            description += ", n_threads: {}".format(self.n_threads)
+        return description + "]"
+
+
+class ImportTimeConfiguration:
+    """ImportTimeConfiguration describes the measurement of the interpreter startup with the
+    fairlearn imports. The startup doesn't depend on the performance test configurations, so
+    it's measured once per session with `warm_runs` warm runs.
+    """
+
+    def __init__(self, warm_runs):
+        self.warm_runs = warm_runs
+
+    def __repr__(self):
+        return "[import_time]"
+
 
+def get_disparity_metrics(mitigator):
+    if mitigator == THRESHOLD_OPTIMIZER:
+        return POSTPROCESSING_DISPARITY_METRICS
+    elif mitigator in [EXPONENTIATED_GRADIENT, GRID_SEARCH]:
+        return REDUCTIONS_DISPARITY_METRICS
+    else:
+        raise Exception("Unknown mitigator {}".format(mitigator))
 
-def get_all_perf_test_configurations():
+
+def get_default_disparity_metric(mitigator):
+    if mitigator == THRESHOLD_OPTIMIZER:
+        return 'demographic_parity'
+    return DEMOGRAPHIC_PARITY
+
+
+def get_all_perf_test_configurations(include_scalability_sweep=False,
+                                     hyperparameter_sampling=None, hyperparameter_samples=20,
+                                     thread_counts=None):
     perf_test_configurations = []
     for dataset in DATASETS:
         for estimator in ESTIMATORS:
             for mitigator in MITIGATORS:
-                if mitigator == THRESHOLD_OPTIMIZER:
-                    disparity_metrics = ["'equalized_odds'", "'demographic_parity'"]
-                elif mitigator == EXPONENTIATED_GRADIENT:
-                    disparity_metrics = ["EqualizedOdds()", "DemographicParity()", "ErrorRateParity()", "FalsePositiveRateParity()", "TruePositiveRateParity()"]
-                elif mitigator == GRID_SEARCH:
-                    disparity_metrics = ["EqualizedOdds()", "DemographicParity()", "ErrorRateParity()", "FalsePositiveRateParity()", "TruePositiveRateParity()"]
-                else:
-                    raise Exception("Unknown mitigator {}".format(mitigator))
-
-                for disparity_metric in disparity_metrics:
+                for disparity_metric in get_disparity_metrics(mitigator):
                     perf_test_configurations.append(
                         PerfTestConfiguration(dataset, estimator, mitigator, disparity_metric))
 
+    if include_scalability_sweep:
+        perf_test_configurations.extend(get_scalability_perf_test_configurations())
+
+    if hyperparameter_sampling is not None:
+        perf_test_configurations.extend(get_hyperparameter_perf_test_configurations(
+            hyperparameter_sampling, hyperparameter_samples))
+
+    if thread_counts:
+        perf_test_configurations.extend(get_thread_scaling_perf_test_configurations(
+            thread_counts))
+
+    return perf_test_configurations
+
+
+def get_scalability_perf_test_configurations():
+    # The synthetic datasets go up to millions of rows and hundreds of groups, so the sweep
+    # only uses the fast decision tree and a single disparity metric per mitigator.
+    perf_test_configurations = []
+    for dataset in get_scalability_datasets():
+        for mitigator in MITIGATORS:
+            perf_test_configurations.append(
+                PerfTestConfiguration(dataset, DECISION_TREE_CLASSIFIER, mitigator,
+                                      get_default_disparity_metric(mitigator)))
+    return perf_test_configurations
+
+
+def get_thread_scaling_perf_test_configurations(thread_counts):
+    # Every configuration runs with each thread count, so that the speedup over the smallest
+    # thread count shows how well the mitigation uses the cores of a node.
+    perf_test_configurations = []
+    for estimator in MULTICORE_ESTIMATORS:
+        for mitigator in MITIGATORS:
+            for n_threads in thread_counts:
+                threaded_estimator = estimator.with_params(n_jobs=n_threads) \
+                    if estimator in _N_JOBS_ESTIMATORS else estimator
+                perf_test_configurations.append(
+                    PerfTestConfiguration(ADULT_UCI, threaded_estimator, mitigator,
+                                          get_default_disparity_metric(mitigator),
+                                          n_threads=n_threads))
     return perf_test_configurations
 
 
+def get_hyperparameter_perf_test_configurations(sampling_method=LATIN_HYPERCUBE, n_samples=20):
+    # The sampling is seeded so that the same configurations are compared across commits.
+    perf_test_configurations = []
+    for mitigator, axes in HYPERPARAMETER_AXES.items():
+        for point in sample_hyperparameters(axes, sampling_method, n_samples):
+            mitigator_params = dict(point)
+            dataset = get_base_dataset(mitigator_params.pop(N_GROUPS))
+            disparity_metric = mitigator_params.pop(DISPARITY_METRIC)
+            perf_test_configurations.append(
+                PerfTestConfiguration(dataset, DECISION_TREE_CLASSIFIER, mitigator,
+                                      disparity_metric, mitigator_params))
+    return perf_test_configurations
+
+
+def pytest_addoption(parser):
+    parser.addoption("--workers", action="store", type=int, default=None,
+                     help="number of worker processes used to run the scripts locally; "
+                          "each worker is pinned to its own set of cores")
+    parser.addoption("--shards", action="store", type=int, default=0,
+                     help="pack the configurations into this many shards that each run many "
+                          "configurations sequentially within one job; locally every shard "
+                          "runs on one worker")
+    parser.addoption("--max-concurrent-runs", action="store", type=int, default=10,
+                     help="maximum number of Azure ML runs that are submitted at the same time")
+    parser.addoption("--run-timeout", action="store", type=float, default=None,
+                     help="seconds after which a run is canceled; Azure ML runs are retried, "
+                          "local scripts fail; by default runs don't time out")
+    parser.addoption("--run-retries", action="store", type=int, default=1,
+                     help="number of times an Azure ML run is resubmitted after it failed or "
+                          "timed out")
+    parser.addoption("--trace-allocations", action="store_true", default=False,
+                     help="trace allocations with tracemalloc in addition to measuring the "
+                          "peak RSS; this slows down the measured phases considerably")
+    parser.addoption("--warmup-iterations", action="store", type=int, default=0,
+                     help="number of unmeasured runs of every timed phase")
+    parser.addoption("--trials", action="store", type=int, default=1,
+                     help="number of measured runs of every timed phase; with more than one "
+                          "trial the median, IQR, minimum and a bootstrap confidence interval "
+                          "are reported")
+    parser.addoption("--profile", action="store", default=None, choices=PROFILERS,
+                     help="profile the estimator_fit and mitigation phases with cProfile or a "
+                          "sampling profiler that writes collapsed stacks for flamegraphs")
+    parser.addoption("--profile-directory", action="store",
+                     default=os.path.join("perf", "profiles"),
+                     help="directory for the profiles and resource samples of local runs; "
+                          "remote runs write them to their outputs")
+    parser.addoption("--streaming-rows", action="store", type=int, default=0,
+                     help="number of rows of an out-of-core test set on which the prediction "
+                          "is additionally benchmarked in chunks, e.g., 200000; by default the "
+                          "streaming benchmark is disabled")
+    parser.addoption("--import-time-runs", action="store", type=int, default=0,
+                     help="number of fresh interpreters whose warm startup with the fairlearn "
+                          "imports is measured once per session, e.g., 3; by default the "
+                          "import time isn't measured")
+    parser.addoption("--resource-sampling-interval", action="store", type=float, default=0,
+                     help="seconds between samples of CPU, memory, thread and I/O usage that are "
+                          "taken throughout every script, e.g., 0.1; by default no samples are "
+                          "taken")
+    parser.addoption("--wheel-cache-directory", action="store",
+                     default=DEFAULT_WHEEL_CACHE_DIRECTORY,
+                     help="directory in which fairlearn wheels are cached by source hash")
+    parser.addoption("--results-database", action="store",
+                     default=os.path.join("perf", "results.sqlite"),
+                     help="SQLite database in which the metrics of all runs are stored")
+    parser.addoption("--budgets", action="store", default=None,
+                     help="JSON file with performance budgets, e.g., "
+                          "fairlearn-performance/perf/budgets.json; test cases fail if a "
+                          "measurement exceeds its budget by more than the tolerance")
+    parser.addoption("--budget-tolerance", action="store", type=float, default=None,
+                     help="relative tolerance on top of the budgets; defaults to the tolerance "
+                          "in the budgets file")
+    parser.addoption("--scalability-sweep", action="store_true", default=False,
+                     help="add configurations with synthetic datasets that vary the number of "
+                          "samples, features, sensitive feature groups and the label "
+                          "imbalance on a log scale")
+    parser.addoption("--thread-counts", action="store", default=None,
+                     type=lambda value: [int(count) for count in value.split(",")],
+                     help="comma-separated thread counts, e.g., 1,2,4,8; adds configurations "
+                          "with multi-core estimators that run with each of the thread counts")
+    parser.addoption("--hyperparameter-sweep", action="store", default=None,
+                     choices=SAMPLING_METHODS,
+                     help="add configurations that vary the reductions' hyperparameters and "
+                          "number of constraints, sampled with a latin hypercube or one axis "
+                          "at a time")
+    parser.addoption("--hyperparameter-samples", action="store", type=int, default=20,
+                     help="number of latin hypercube samples per mitigator of the "
+                          "hyperparameter sweep")
+
+
 @pytest.fixture(scope="session")
 def workspace():
     return get_workspace()
 
 
 @pytest.fixture(scope="session")
-def wheel_file():
-    return build_package()
+def wheel_file(request):
+    return build_package(LocalWheelCache(request.config.getoption("--wheel-cache-directory")))
+
+
+@pytest.fixture(scope="session")
+def local_execution_engine(request, workspace):
+    if workspace:
+        yield None
+        return
+
+    with LocalExecutionEngine(workers=request.config.getoption("--workers")) as engine:
+        yield engine
+
+
+@pytest.fixture(scope="session")
+def fairlearn_commit():
+    return get_fairlearn_commit()
+
+
+@pytest.fixture(scope="session")
+def results_store(request):
+    results_store = ResultsStore(request.config.getoption("--results-database"))
+    yield results_store
+    results_store.close()
+
+
+@pytest.fixture(scope="session")
+def budgets(request):
+    budgets_file = request.config.getoption("--budgets")
+    return Budgets.load(budgets_file) if budgets_file else None
@@ -2,13 +2,95 @@
 # Licensed under the MIT License.
 
 from azureml.core import Environment
+import hashlib
 import os
 import shutil
 import subprocess
-import time
 
 
-def build_package():
+# Only these files and directories of the fairlearn repository end up in the wheel, so changes
+# elsewhere, e.g., in tests or docs, don't require a new wheel.
+_WHEEL_SOURCES = ["fairlearn", "setup.py", "setup.cfg", "pyproject.toml", "MANIFEST.in",
+                  "README.md", "requirements.txt"]
+_EXCLUDED_DIRECTORIES = ["__pycache__", "build", "dist", "fairlearn.egg-info"]
+
+DEFAULT_WHEEL_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "fairlearn-perf",
+                                             "wheels")
+
+
+def compute_source_hash(source_directory="fairlearn"):
+    """Compute a hash over the paths and contents of the fairlearn sources that go into the
+    wheel.
+    """
+    # without sources the hash would be the same for every checkout and could match a stale
+    # cached wheel
+    if not os.path.isdir(source_directory):
+        raise Exception("Couldn't find the fairlearn sources in {}.".format(source_directory))
+
+    source_hash = hashlib.sha256()
+    n_hashed_files = 0
+    for wheel_source in _WHEEL_SOURCES:
+        path = os.path.join(source_directory, wheel_source)
+        if os.path.isfile(path):
+            file_paths = [path]
+        else:
+            file_paths = []
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [directory for directory in dirs
+                           if directory not in _EXCLUDED_DIRECTORIES]
+                file_paths.extend(os.path.join(root, file_) for file_ in files
+                                  if not file_.endswith(".pyc"))
+        for file_path in sorted(file_paths):
+            relative_path = os.path.relpath(file_path, source_directory).replace(os.sep, "/")
+            source_hash.update(relative_path.encode('utf-8') + b"\0")
+            with open(file_path, 'rb') as source_file:
+                source_hash.update(source_file.read())
+            n_hashed_files += 1
+
+    if n_hashed_files == 0:
+        raise Exception("Couldn't find any fairlearn sources to hash in {}."
+                        .format(source_directory))
+    return source_hash.hexdigest()
+
+
+class LocalWheelCache:
+    """LocalWheelCache stores wheels in a local directory keyed by the hash of their sources.
+
+    The cached wheels have a name that only depends on the source hash, so that unchanged
+    sources result in the same private pip wheel and the same Azure ML environment.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory if directory is not None else DEFAULT_WHEEL_CACHE_DIRECTORY
+
+    def get_wheel_path(self, source_hash):
+        # wheel file names need a valid version, so the hash is converted to a number
+        return os.path.join(self.directory, "fairlearn-v{}-py3-none-any.whl"
+                                            .format(int(source_hash[:12], 16)))
+
+    def get(self, source_hash):
+        wheel_path = self.get_wheel_path(source_hash)
+        return wheel_path if os.path.exists(wheel_path) else None
+
+    def put(self, source_hash, wheel_file):
+        os.makedirs(self.directory, exist_ok=True)
+        wheel_path = self.get_wheel_path(source_hash)
+        temporary_path = wheel_path + ".tmp"
+        shutil.copy(wheel_file, temporary_path)
+        os.replace(temporary_path, wheel_path)
+        return wheel_path
+
+
+def build_package(wheel_cache=None):
+    if wheel_cache is None:
+        wheel_cache = LocalWheelCache()
+
+    source_hash = compute_source_hash()
+    cached_wheel = wheel_cache.get(source_hash)
+    if cached_wheel:
+        print("Using cached wheel {} for source hash {}".format(cached_wheel, source_hash))
+        return cached_wheel
+
     print('removing build directory')
     shutil.rmtree(os.path.join("fairlearn", "build"), True)
     print('removing fairlearn.egg-info')
@@ -25,21 +107,30 @@ def build_package():
         for file_ in files:
             if file_.endswith(".whl"):
                 print("Found wheel {}".format(file_))
-                # change wheel name to be unique for every run
-                src = os.path.join("fairlearn", "dist", file_)
-                dst = os.path.join("fairlearn", "dist", "fairlearn-v{}-py3-none-any.whl"
-                                   .format(time.time()))
-                shutil.copy(src, dst)
-                return dst
+                # cache the wheel under a name that is unique for its sources
+                return wheel_cache.put(source_hash, os.path.join("fairlearn", "dist", file_))
 
     raise Exception("Couldn't find wheel file.")
 
 
+def get_environment_name(wheel_file=None):
+    if wheel_file is None:
+        return "env"
+    # the wheel name is derived from the source hash, so the environment can be reused
+    return "env-{}".format(os.path.basename(wheel_file).split("-")[1])
+
+
 def configure_environment(workspace, wheel_file=None, requirements_file=None):
+    environment_name = get_environment_name(wheel_file)
+    if wheel_file and environment_name in Environment.list(workspace):
+        print("reusing registered environment {}".format(environment_name))
+        return Environment.get(workspace, environment_name)
+
     # collect external requirements from requirements file
     if requirements_file is None:
         requirements_file = 'requirements.txt'
-    environment = Environment.from_pip_requirements(name="env", file_path=requirements_file)
+    environment = Environment.from_pip_requirements(name=environment_name,
+                                                    file_path=requirements_file)
 
     # add private pip wheel to blob if provided
     if wheel_file:
@@ -49,6 +140,8 @@ def configure_environment(workspace, wheel_file=None, requirements_file=None):
 
     # add azureml-sdk to log metrics
     environment.python.conda_dependencies.add_pip_package("azureml-sdk")
+    # limits the thread pools of the thread scaling configurations
+    environment.python.conda_dependencies.add_pip_package("threadpoolctl")
 
     # set docker to enabled for AmlCompute
     environment.docker.enabled = True
@@ -0,0 +1,78 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Hyperparameter axes of the mitigation techniques and sparse designs that sample
+configurations from them, so that varying several axes together doesn't require the full
+cartesian product.
+"""
+
+import random
+
+LATIN_HYPERCUBE = "latin_hypercube"
+ONE_AT_A_TIME = "one_at_a_time"
+SAMPLING_METHODS = [LATIN_HYPERCUBE, ONE_AT_A_TIME]
+
+
+class Axis:
+    """Axis is a hyperparameter with the levels it's sampled from and its default level."""
+
+    def __init__(self, name, levels, default):
+        if default not in levels:
+            raise ValueError("The default {!r} of axis {} is not one of its levels {}."
+                             .format(default, name, levels))
+        self.name = name
+        self.levels = levels
+        self.default = default
+
+    def __repr__(self):
+        return "{}: {}".format(self.name, self.levels)
+
+
+def sample_latin_hypercube(axes, n_samples, seed=0):
+    """Return up to `n_samples` points, i.e., dictionaries from axis name to level, such that
+    every axis is split into `n_samples` equally sized strata that are each hit exactly once.
+    Points that are drawn more than once, which happens for axes with few levels, are only
+    returned once.
+    """
+    if n_samples < 1:
+        raise ValueError("At least one sample is required, got {}.".format(n_samples))
+
+    rng = random.Random(seed)
+    columns = {}
+    for axis in axes:
+        strata = list(range(n_samples))
+        rng.shuffle(strata)
+        columns[axis.name] = [axis.levels[int((stratum + rng.random()) / n_samples
+                                              * len(axis.levels))]
+                              for stratum in strata]
+    points = [{axis.name: columns[axis.name][i] for axis in axes} for i in range(n_samples)]
+    return _remove_duplicates(points)
+
+
+def sample_one_at_a_time(axes):
+    """Return the point with all axes at their defaults as well as the points that vary one
+    axis at a time over all its levels while keeping the others at their defaults.
+    """
+    default_point = {axis.name: axis.default for axis in axes}
+    points = [default_point]
+    for axis in axes:
+        for level in axis.levels:
+            points.append(dict(default_point, **{axis.name: level}))
+    return _remove_duplicates(points)
+
+
+def sample_hyperparameters(axes, sampling_method, n_samples, seed=0):
+    if sampling_method == LATIN_HYPERCUBE:
+        return sample_latin_hypercube(axes, n_samples, seed)
+    elif sampling_method == ONE_AT_A_TIME:
+        return sample_one_at_a_time(axes)
+    else:
+        raise ValueError("Unknown sampling method {}, expected one of {}."
+                         .format(sampling_method, SAMPLING_METHODS))
+
+
+def _remove_duplicates(points):
+    unique_points = {}
+    for point in points:
+        unique_points.setdefault(repr(sorted(point.items(), key=lambda item: item[0])), point)
+    return list(unique_points.values())
@@ -0,0 +1,323 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Utilities to run the generated performance test scripts locally on a pool of warm,
+reusable worker processes.
+"""
+
+import contextlib
+import functools
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import runpy
+import signal
+import threading
+import traceback
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Modules that every generated script imports. Importing them once per worker means that
+# individual scripts don't pay for the interpreter start and the heavy imports.
+_WARM_UP_MODULES = [
+    "fairlearn.postprocessing",
+    "fairlearn.reductions",
+    "sklearn.ensemble",
+    "sklearn.linear_model",
+    "sklearn.svm",
+    "sklearn.tree",
+    "tempeh.configurations",
+]
+
+# seconds that a worker waits for its core set; the initial workers get theirs right away
+_CORE_SET_TIMEOUT = 5
+
+_WORKER_DIED = "The worker process died while running the script, e.g., because it was " \
+               "killed, ran out of memory or crashed."
+_CANCELED = "The script was canceled."
+
+# the queue through which a worker reports the tasks it starts, set by _initialize_worker
+_started_task_queue = None
+
+
+class ScriptResult:
+    def __init__(self, script_path, output, metrics=None, error=None):
+        self.script_path = script_path
+        self.output = output
+        self.metrics = metrics if metrics is not None else {}
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+
+class LocalExecutionEngine:
+    """LocalExecutionEngine runs generated scripts in-process on a pool of workers.
+
+    Each worker imports the modules that the scripts need once and is then reused for
+    many scripts. Where the platform supports it every worker is pinned to its own set of
+    cores so that concurrently running scripts don't compete for the same cores, which
+    keeps the measured times comparable to a run with a single worker.
+
+    A worker that dies, e.g., because it was killed or ran out of memory, breaks the pool.
+    The engine then replaces the pool and resubmits the scripts that hadn't started yet. The
+    scripts that were running are rerun one at a time in a fresh worker of their own, so
+    that the script that killed its worker fails with an error rather than the ones next to
+    it.
+
+    engine = LocalExecutionEngine(workers=4)
+    future = engine.submit("perf/scripts/1234.py")
+    script_result = future.result()
+    engine.close()
+    """
+
+    def __init__(self, workers=None, pin_cores=True):
+        if workers is None:
+            workers = 1
+        if workers < 1:
+            raise ValueError("The number of workers needs to be at least 1, got {}."
+                             .format(workers))
+
+        self.workers = workers
+        self._core_sets = _split_cores(workers) if pin_cores else None
+        self._context = multiprocessing.get_context()
+        # unlike Queue, SimpleQueue writes synchronously, so a report survives a worker that
+        # dies right after it
+        self._started_task_queue = self._context.SimpleQueue()
+        self._lock = threading.RLock()
+        self._isolation_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._tasks = {}
+        self._executor = self._create_executor(workers, self._core_sets)
+
+    def submit(self, script_path):
+        """Schedule a script for execution and return a `concurrent.futures.Future` which
+        yields a `ScriptResult`.
+        """
+        return self._submit([script_path], single_script=True)
+
+    def submit_shard(self, script_paths):
+        """Schedule several scripts for sequential execution on the same worker and return a
+        `concurrent.futures.Future` which yields a list of `ScriptResult`.
+        """
+        return self._submit(script_paths, single_script=False)
+
+    def cancel(self, future):
+        """Cancel the scripts of a future. If they are already running their worker is
+        terminated, and the engine replaces it.
+        """
+        with self._lock:
+            task = next((task for task in self._tasks.values() if task.future is future), None)
+            if task is None:
+                return
+            task.canceled = True
+            if task.executor_future is not None and task.executor_future.cancel():
+                return
+            self._update_started_tasks()
+            if task.pid is not None and not task.future.done():
+                # TerminateProcess on Windows
+                os.kill(task.pid, signal.SIGTERM)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):  # noqa: A002
+        self.close()
+
+    def _submit(self, script_paths, single_script):
+        task = _Task(next(self._task_ids), script_paths, single_script)
+        with self._lock:
+            self._tasks[task.task_id] = task
+        self._start(task)
+        return task.future
+
+    def _create_executor(self, workers, core_sets=None):
+        core_set_queue = None
+        if core_sets:
+            core_set_queue = self._context.Queue()
+            for core_set in core_sets:
+                core_set_queue.put(core_set)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=self._context,
+                                   initializer=_initialize_worker,
+                                   initargs=(core_set_queue, self._started_task_queue))
+
+    def _replace_executor(self, broken_executor):
+        with self._lock:
+            if broken_executor is self._executor:
+                broken_executor.shutdown(wait=False)
+                self._executor = self._create_executor(self.workers, self._core_sets)
+
+    def _start(self, task):
+        with self._lock:
+            executor = self._executor
+            try:
+                task.executor_future = executor.submit(_run_task, task.task_id,
+                                                       task.script_paths)
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                executor = self._executor
+                task.executor_future = executor.submit(_run_task, task.task_id,
+                                                       task.script_paths)
+        task.executor_future.add_done_callback(
+            functools.partial(self._on_task_done, executor, task))
+
+    def _on_task_done(self, executor, task, executor_future):
+        try:
+            self._finish(task, executor_future.result())
+        except CancelledError:
+            self._finish(task, None, _CANCELED)
+        except BrokenProcessPool:
+            # the callback runs on the executor's management thread, which mustn't block
+            threading.Thread(target=self._recover, args=(executor, task), daemon=True).start()
+        except BaseException:  # noqa: B902
+            self._finish(task, None, traceback.format_exc())
+
+    def _recover(self, broken_executor, task):
+        self._replace_executor(broken_executor)
+        with self._lock:
+            self._update_started_tasks()
+            started = task.pid is not None
+        if task.canceled:
+            self._finish(task, None, _CANCELED)
+        elif not started:
+            # queued behind the script that killed its worker
+            self._start(task)
+        else:
+            self._finish(task, [self._run_isolated(task, script_path)
+                                for script_path in task.script_paths])
+
+    def _run_isolated(self, task, script_path):
+        # one script at a time, so that the rerun scripts don't compete for the cores
+        with self._isolation_lock:
+            executor = self._create_executor(1)
+            try:
+                with self._lock:
+                    if task.canceled:
+                        return ScriptResult(script_path, "", error=_CANCELED)
+                    task.pid = None
+                    task.executor_future = executor.submit(_run_task, task.task_id,
+                                                           [script_path])
+                return task.executor_future.result()[0]
+            except (BrokenProcessPool, CancelledError):
+                return ScriptResult(script_path, "",
+                                    error=_CANCELED if task.canceled else _WORKER_DIED)
+            finally:
+                executor.shutdown(wait=False)
+
+    def _update_started_tasks(self):
+        while not self._started_task_queue.empty():
+            task_id, pid = self._started_task_queue.get()
+            if task_id in self._tasks:
+                self._tasks[task_id].pid = pid
+
+    def _finish(self, task, script_results, error=None):
+        with self._lock:
+            self._tasks.pop(task.task_id, None)
+        if script_results is None:
+            script_results = [ScriptResult(script_path, "", error=error)
+                              for script_path in task.script_paths]
+        if not task.future.done():
+            task.future.set_result(script_results[0] if task.single_script
+                                   else script_results)
+
+
+class _Task:
+    def __init__(self, task_id, script_paths, single_script):
+        self.task_id = task_id
+        self.script_paths = script_paths
+        self.single_script = single_script
+        self.future = Future()
+        self.executor_future = None
+        # the process of the worker that runs the task once it started
+        self.pid = None
+        self.canceled = False
+
+
+def _run_task(task_id, script_paths):
+    if _started_task_queue is not None:
+        _started_task_queue.put((task_id, os.getpid()))
+    return run_scripts(script_paths)
+
+
+def run_script(script_path):
+    """Run a generated script in the current process and capture its output as well as the
+    metrics it logged to its local `run`.
+    """
+    output = io.StringIO()
+    metrics = None
+    error = None
+    # scripts may set thread limits, which must not leak into the next script of the worker
+    environment = dict(os.environ)
+    with contextlib.redirect_stdout(output), _preserve_thread_limits():
+        try:
+            script_globals = runpy.run_path(script_path, run_name="__main__")
+            metrics = getattr(script_globals.get("run"), "metrics", None)
+        except BaseException:  # noqa: B902
+            error = traceback.format_exc()
+        finally:
+            os.environ.clear()
+            os.environ.update(environment)
+    return ScriptResult(script_path, output.getvalue(), metrics, error)
+
+
+def run_scripts(script_paths):
+    return [run_script(script_path) for script_path in script_paths]
+
+
+def _preserve_thread_limits():
+    """Return a context manager that restores the limits of the OpenMP and BLAS thread pools
+    on exit.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return contextlib.nullcontext()
+    return threadpool_limits(limits=None)
+
+
+def _split_cores(workers):
+    if not hasattr(os, "sched_getaffinity"):
+        # core pinning is only available on Linux
+        return None
+
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < workers:
+        print("Only {} cores available for {} workers, not pinning workers to cores."
+              .format(len(cores), workers))
+        return None
+
+    cores_per_worker = len(cores) // workers
+    return [cores[i * cores_per_worker:(i + 1) * cores_per_worker] for i in range(workers)]
+
+
+def _initialize_worker(core_set_queue, started_task_queue=None):
+    global _started_task_queue
+    _started_task_queue = started_task_queue
+
+    if core_set_queue is not None:
+        # The pool replaces workers that exited, e.g., because a script called os._exit, and
+        # the replacements find the queue empty. They run on all allowed cores instead of
+        # blocking forever. A short timeout rather than get_nowait avoids missing core sets
+        # that the queue's feeder thread hasn't flushed yet.
+        try:
+            core_set = core_set_queue.get(timeout=_CORE_SET_TIMEOUT)
+        except queue.Empty:
+            core_set = None
+        if core_set is None:
+            print("worker {} got no core set, not pinning it to cores".format(os.getpid()))
+        else:
+            os.sched_setaffinity(0, core_set)
+            print("worker {} pinned to cores {}".format(os.getpid(), core_set))
+
+    for module_name in _WARM_UP_MODULES:
+        try:
+            __import__(module_name)
+        except ImportError:
+            print("worker {} could not import {}".format(os.getpid(), module_name))
@@ -0,0 +1,93 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+_RSS_BEFORE = "_rss_before"
+_PEAK_RSS_RESET = "_peak_rss_reset"
+_PEAK_RSS = "_peak_rss"
+_PEAK_RSS_LIFETIME = "_peak_rss_lifetime"
+_PEAK_RSS_INCREASE = "_peak_rss_increase"
+_TRACEMALLOC_PEAK = "_tracemalloc_peak"
+_TOP_ALLOCATION_SITES = "_top_allocation_sites"
+
+
+class MemoryTracking:
+    """MemoryTracking generates the python script to measure memory usage.
+
+    Specifically, it measures the peak resident set size (RSS) of the process from the
+    start to the end of the with-statement that MemoryTracking is used for. Where the peak
+    can't be reset, e.g., on Windows and macOS, only the peak over the lifetime of the process
+    is available, which is logged separately since it may stem from earlier code. If
+    `trace_allocations` is set it additionally records the peak of the memory traced by
+    `tracemalloc` and the sites of the largest allocations that are still alive at the end.
+    Tracing allocations slows down allocation-heavy code considerably, so it should not be
+    combined with time measurements that are meant to be accurate.
+
+    MemoryTracking writes the code under the assumption that the helper functions from
+    memory_tracking_script.txt and an Azure Machine Learning `azureml-core:azureml.core.Run`
+    object called `run` exist and logs the metrics under that run.
+
+    with MemoryTracking("special_period", script_lines, trace_allocations=True):
+    #     do something
+
+    The memory usage within the with-statement is automatically tracked and saved to the
+    run as metrics.
+    """
+
+    def __init__(self, procedure_name, script_lines, trace_allocations=False,
+                 top_allocation_sites=10):
+        # The procedure name is used in variable names to make them unique,
+        # so it cannot contain whitespace.
+        assert " " not in procedure_name
+
+        self.procedure_name = procedure_name
+        self.script_lines = script_lines
+        self.trace_allocations = trace_allocations
+        self.top_allocation_sites = top_allocation_sites
+
+    def __enter__(self):
+        self.script_lines.append("{} = get_rss()".format(self.procedure_name + _RSS_BEFORE))
+        self.script_lines.append("{} = reset_peak_rss()"
+                                 .format(self.procedure_name + _PEAK_RSS_RESET))
+        if self.trace_allocations:
+            self.script_lines.append("start_tracing_allocations()")
+
+    def __exit__(self, type, value, traceback):  # noqa: A002
+        rss_before_variable_name = self.procedure_name + _RSS_BEFORE
+        peak_rss_variable_name = self.procedure_name + _PEAK_RSS
+        peak_rss_increase_variable_name = self.procedure_name + _PEAK_RSS_INCREASE
+        peak_rss_reset_variable_name = self.procedure_name + _PEAK_RSS_RESET
+        peak_rss_lifetime_variable_name = self.procedure_name + _PEAK_RSS_LIFETIME
+        self.script_lines.append("{} = get_peak_rss() if {} else None"
+                                 .format(peak_rss_variable_name, peak_rss_reset_variable_name))
+        self.script_lines.append("if not {}:".format(peak_rss_reset_variable_name))
+        self.script_lines.append("    {} = get_peak_rss()"
+                                 .format(peak_rss_lifetime_variable_name))
+        self.script_lines.append("    if {} is not None:".format(peak_rss_lifetime_variable_name))
+        self.script_lines.append("        run.log('{0}', {0})"
+                                 .format(peak_rss_lifetime_variable_name))
+        self.script_lines.append("if {} is not None:".format(peak_rss_variable_name))
+        self.script_lines.append("    run.log('{0}', {0})".format(peak_rss_variable_name))
+        self.script_lines.append("    print(\"{} peak RSS: {{}}B\".format({}))"
+                                 .format(self.procedure_name, peak_rss_variable_name))
+        self.script_lines.append("if {} is not None and {} is not None:"
+                                 .format(peak_rss_variable_name, rss_before_variable_name))
+        self.script_lines.append("    {} = {} - {}"
+                                 .format(peak_rss_increase_variable_name,
+                                         peak_rss_variable_name, rss_before_variable_name))
+        self.script_lines.append("    run.log('{0}', {0})"
+                                 .format(peak_rss_increase_variable_name))
+
+        if self.trace_allocations:
+            tracemalloc_peak_variable_name = self.procedure_name + _TRACEMALLOC_PEAK
+            top_allocation_sites_variable_name = self.procedure_name + _TOP_ALLOCATION_SITES
+            self.script_lines.append("{}, {} = stop_tracing_allocations({})"
+                                     .format(tracemalloc_peak_variable_name,
+                                             top_allocation_sites_variable_name,
+                                             self.top_allocation_sites))
+            self.script_lines.append("run.log('{0}', {0})"
+                                     .format(tracemalloc_peak_variable_name))
+            self.script_lines.append("run.log_list('{0}', {0})"
+                                     .format(top_allocation_sites_variable_name))
+            self.script_lines.append("print(\"{} tracemalloc peak: {{}}B\".format({}))"
+                                     .format(self.procedure_name,
+                                             tracemalloc_peak_variable_name))
@@ -0,0 +1,260 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Utilities to submit performance test runs concurrently, wait for them and collect their
+metrics into a single set of results.
+"""
+
+import abc
+import asyncio
+import os
+import time
+
+from local_execution import ScriptResult
+
+
+RUNNING = "Running"
+COMPLETED = "Completed"
+FAILED = "Failed"
+CANCELED = "Canceled"
+TIMED_OUT = "TimedOut"
+TERMINAL_STATUSES = [COMPLETED, FAILED, CANCELED]
+
+
+class Job(abc.ABC):
+    """Job is the interface of everything the Orchestrator can run.
+
+    `submit` starts the job and returns a handle, `get_status` returns the current status of
+    the handle, `collect` returns a dictionary from script name to `ScriptResult` once the job
+    is done, and `cancel` stops the job if the backend supports it. All of them may block, so
+    they are called in a thread.
+    """
+
+    name = None
+    script_names = []
+
+    @abc.abstractmethod
+    def submit(self):
+        pass
+
+    @abc.abstractmethod
+    def get_status(self, handle):
+        pass
+
+    @abc.abstractmethod
+    def collect(self, handle):
+        pass
+
+    def cancel(self, handle):
+        pass
+
+
+class LocalScriptJob(Job):
+    """LocalScriptJob runs a single generated script on a worker of a `LocalExecutionEngine`."""
+
+    def __init__(self, local_execution_engine, script_directory, script_name):
+        self.local_execution_engine = local_execution_engine
+        self.script_directory = script_directory
+        self.script_names = [script_name]
+        self.name = script_name
+
+    def submit(self):
+        return self.local_execution_engine.submit(os.path.join(self.script_directory,
+                                                               self.name))
+
+    def get_status(self, handle):
+        return get_local_status(handle)
+
+    def collect(self, handle):
+        return {self.name: handle.result()} if handle.done() else {}
+
+    def cancel(self, handle):
+        self.local_execution_engine.cancel(handle)
+
+
+class LocalShardJob(Job):
+    """LocalShardJob runs a shard of scripts sequentially on one worker of a
+    `LocalExecutionEngine`.
+    """
+
+    def __init__(self, shard_backend, shard, script_directory):
+        self.shard_backend = shard_backend
+        self.shard = shard
+        self.script_directory = script_directory
+        self.script_names = shard.script_names
+        self.name = "shard_{}".format(shard.index)
+
+    def submit(self):
+        return self.shard_backend.submit(self.shard, self.script_directory)
+
+    def get_status(self, handle):
+        return get_local_status(handle)
+
+    def collect(self, handle):
+        return dict(zip(self.script_names, handle.result())) if handle.done() else {}
+
+    def cancel(self, handle):
+        self.shard_backend.local_execution_engine.cancel(handle)
+
+
+class AzureMLScriptJob(Job):
+    """AzureMLScriptJob runs a single generated script as an Azure ML run."""
+
+    def __init__(self, experiment, script_run_config, script_name, tags=None):
+        self.experiment = experiment
+        self.script_run_config = script_run_config
+        self.script_names = [script_name]
+        self.name = script_name
+        self.tags = tags
+
+    def submit(self):
+        return self.experiment.submit(config=self.script_run_config, tags=self.tags)
+
+    def get_status(self, handle):
+        return handle.get_status()
+
+    def collect(self, handle):
+        return {self.name: get_script_result(handle, self.name)}
+
+    def cancel(self, handle):
+        handle.cancel()
+
+
+class AzureMLShardJob(Job):
+    """AzureMLShardJob runs a shard of scripts as a single Azure ML run with a child run per
+    script.
+    """
+
+    def __init__(self, shard_backend, shard, script_directory):
+        self.shard_backend = shard_backend
+        self.shard = shard
+        self.script_directory = script_directory
+        self.script_names = shard.script_names
+        self.name = "shard_{}".format(shard.index)
+
+    def submit(self):
+        return self.shard_backend.submit(self.shard, self.script_directory)
+
+    def get_status(self, handle):
+        return handle.get_status()
+
+    def collect(self, handle):
+        return collect_child_results(handle)
+
+    def cancel(self, handle):
+        handle.cancel()
+
+
+def get_local_status(future):
+    # the scripts' own errors and dead workers are part of the results, so the engine's
+    # futures always complete
+    return COMPLETED if future.done() else RUNNING
+
+
+def get_script_result(run, script_name):
+    status = run.get_status()
+    error = None if status == COMPLETED else \
+        "Run {} ended with status {}".format(run.id, status)
+    return ScriptResult(script_name, "", run.get_metrics(), error)
+
+
+def collect_child_results(run):
+    return {child_run.get_tags().get("script"):
+            get_script_result(child_run, child_run.get_tags().get("script"))
+            for child_run in run.get_children()}
+
+
+class JobRecord:
+    """JobRecord is the row of the results table that describes how a job went."""
+
+    def __init__(self, name, status, attempts, duration):
+        self.name = name
+        self.status = status
+        self.attempts = attempts
+        self.duration = duration
+
+    def __repr__(self):
+        return "{}: {} after {} attempt(s) in {:.0f}s".format(self.name, self.status,
+                                                              self.attempts, self.duration)
+
+
+class Orchestrator:
+    """Orchestrator submits jobs concurrently with at most `max_concurrent_jobs` jobs at a
+    time, polls their status every `poll_interval` seconds, cancels jobs that take longer
+    than `timeout` seconds and resubmits failed or timed out jobs up to `retries` times.
+
+    orchestrator = Orchestrator(max_concurrent_jobs=10, timeout=3600, retries=1)
+    script_results, job_records = orchestrator.run(jobs)
+    """
+
+    def __init__(self, max_concurrent_jobs=10, timeout=None, retries=1, poll_interval=30):
+        if max_concurrent_jobs < 1:
+            raise ValueError("At least one concurrent job is required, got {}."
+                             .format(max_concurrent_jobs))
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.timeout = timeout
+        self.retries = retries
+        self.poll_interval = poll_interval
+
+    def run(self, jobs):
+        """Run all jobs and return a dictionary from script name to `ScriptResult` covering
+        every script of every job, as well as a `JobRecord` per job.
+        """
+        return asyncio.run(self._run_all(jobs))
+
+    async def _run_all(self, jobs):
+        semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        outcomes = await asyncio.gather(*[self._run_job(job, semaphore) for job in jobs])
+        script_results = {}
+        job_records = []
+        for job, (job_results, job_record) in zip(jobs, outcomes):
+            script_results.update(job_results)
+            job_records.append(job_record)
+        return script_results, job_records
+
+    async def _run_job(self, job, semaphore):
+        async with semaphore:
+            start_time = time.time()
+            for attempt in range(1, self.retries + 2):
+                status, job_results = await self._attempt_job(job, attempt)
+                if status == COMPLETED:
+                    break
+
+            job_results = self._fill_missing_results(job, job_results, status)
+            return job_results, JobRecord(job.name, status, attempt, time.time() - start_time)
+
+    async def _attempt_job(self, job, attempt):
+        loop = asyncio.get_running_loop()
+        print("submitting {} (attempt {})".format(job.name, attempt))
+        try:
+            handle = await loop.run_in_executor(None, job.submit)
+        except Exception as ex:  # noqa: B902
+            print("submitting {} failed: {}".format(job.name, ex))
+            return FAILED, {}
+
+        try:
+            status = await asyncio.wait_for(self._wait(job, handle), self.timeout)
+        except asyncio.TimeoutError:
+            print("{} timed out after {}s, canceling it".format(job.name, self.timeout))
+            await loop.run_in_executor(None, job.cancel, handle)
+            return TIMED_OUT, {}
+
+        print("{} finished with status {}".format(job.name, status))
+        return status, await loop.run_in_executor(None, job.collect, handle)
+
+    async def _wait(self, job, handle):
+        loop = asyncio.get_running_loop()
+        while True:
+            status = await loop.run_in_executor(None, job.get_status, handle)
+            if status in TERMINAL_STATUSES:
+                return status
+            await asyncio.sleep(self.poll_interval)
+
+    def _fill_missing_results(self, job, job_results, status):
+        # scripts that never reported, e.g., because their job timed out, still need a result
+        for script_name in job.script_names:
+            if script_name not in job_results:
+                job_results[script_name] = ScriptResult(
+                    script_name, "", error="{} ended with status {} without reporting {}"
+                                           .format(job.name, status, script_name))
+        return job_results
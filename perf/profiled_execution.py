@@ -0,0 +1,54 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+CPROFILE = "cprofile"
+SAMPLING = "sampling"
+PROFILERS = [CPROFILE, SAMPLING]
+
+_PROFILER = "_profiler"
+
+
+class ProfiledExecution:
+    """ProfiledExecution generates the python script to profile a procedure.
+
+    Specifically, it profiles the code from the start to the end of the with-statement that
+    ProfiledExecution is used for with either cProfile (`"cprofile"`), which writes a
+    `<procedure_name>.pstats` file, or a sampling profiler (`"sampling"`), which writes the
+    collapsed stacks for flamegraphs to `<procedure_name>.folded`. The files are written to
+    `output_directory` and the `top_n` functions by cumulative time are logged. If `profiler`
+    is None no code is generated.
+
+    ProfiledExecution writes the code under the assumption that the helper functions from
+    profiling_script.txt and an Azure Machine Learning `azureml-core:azureml.core.Run`
+    object called `run` exist and logs the metric under that run.
+
+    with ProfiledExecution("special_period", script_lines, "sampling", "outputs"):
+    #     do something
+    """
+
+    def __init__(self, procedure_name, script_lines, profiler, output_directory, top_n=20):
+        # The procedure name is used in variable names to make them unique,
+        # so it cannot contain whitespace.
+        assert " " not in procedure_name
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError("Unknown profiler {}, expected one of {}."
+                             .format(profiler, PROFILERS))
+
+        self.procedure_name = procedure_name
+        self.script_lines = script_lines
+        self.profiler = profiler
+        self.output_directory = output_directory
+        self.top_n = top_n
+
+    def __enter__(self):
+        if self.profiler is None:
+            return
+        self.script_lines.append("{} = start_profiling('{}')"
+                                 .format(self.procedure_name + _PROFILER, self.profiler))
+
+    def __exit__(self, type, value, traceback):  # noqa: A002
+        if self.profiler is None:
+            return
+        self.script_lines.append("stop_profiling('{}', {}, {!r}, {})"
+                                 .format(self.procedure_name, self.procedure_name + _PROFILER,
+                                         self.output_directory, self.top_n))
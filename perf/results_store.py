@@ -0,0 +1,226 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Utilities to store the metrics of the performance tests locally and to detect performance
+regressions between fairlearn commits without an Azure Machine Learning workspace.
+"""
+
+import argparse
+import datetime
+import numbers
+import os
+import sqlite3
+import subprocess
+import sys
+from statistics import median
+
+
+# Metrics for which lower values are better. Only these are checked for regressions.
+REGRESSION_METRIC_SUFFIXES = [
+    "_execution_time",
+    "_process_time",
+    "_peak_rss",
+    "_peak_rss_increase",
+    "_tracemalloc_peak",
+    "_latency_p50",
+    "_latency_p95",
+    "_latency_p99",
+    "_startup_time",
+    "_import_time",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fairlearn_commit TEXT NOT NULL,
+    configuration TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    phase TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value_index INTEGER NOT NULL,
+    value REAL,
+    text_value TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_commit ON runs(fairlearn_commit, configuration);
+"""
+
+
+def get_fairlearn_commit(fairlearn_directory="fairlearn"):
+    """Determine the commit of the fairlearn repository that is being tested, falling back
+    to the version of the installed fairlearn package.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=fairlearn_directory,
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        import fairlearn
+        return "v{}".format(fairlearn.__version__)
+
+
+class ResultsStore:
+    """ResultsStore keeps the metrics logged by the performance test scripts in a local
+    SQLite database, keyed by fairlearn commit, configuration and phase.
+
+    Metrics are expected to be named `<phase>_<metric>` as emitted by TimedExecution and
+    MemoryTracking; metrics that don't start with any of the given phases are stored with an
+    empty phase. Lists are stored as one row per element.
+    """
+
+    def __init__(self, database_path):
+        directory = os.path.dirname(database_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.database_path = database_path
+        self._connection = sqlite3.connect(database_path)
+        self._connection.executescript(_SCHEMA)
+
+    def record(self, fairlearn_commit, configuration, metrics, phases=()):
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (fairlearn_commit, configuration, recorded_at) "
+                "VALUES (?, ?, ?)",
+                (fairlearn_commit, configuration, datetime.datetime.utcnow().isoformat()))
+            run_id = cursor.lastrowid
+            rows = []
+            for metric, value in metrics.items():
+                phase = _get_phase(metric, phases)
+                values = value if isinstance(value, (list, tuple)) else [value]
+                for value_index, single_value in enumerate(values):
+                    if isinstance(single_value, numbers.Real):
+                        rows.append((run_id, phase, metric, value_index, float(single_value),
+                                     None))
+                    else:
+                        rows.append((run_id, phase, metric, value_index, None,
+                                     str(single_value)))
+            self._connection.executemany(
+                "INSERT INTO metrics (run_id, phase, metric, value_index, value, text_value) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return run_id
+
+    def get_values(self, fairlearn_commit, metric_suffixes=None):
+        """Return the numeric values recorded for a commit as a dictionary from
+        (configuration, metric) to the list of values across all runs.
+        """
+        values = {}
+        for configuration, metric, value in self._connection.execute(
+                "SELECT runs.configuration, metrics.metric, metrics.value "
+                "FROM metrics JOIN runs ON metrics.run_id = runs.run_id "
+                "WHERE runs.fairlearn_commit = ? AND metrics.value IS NOT NULL "
+                "ORDER BY runs.run_id, metrics.value_index", (fairlearn_commit,)):
+            if metric_suffixes is not None and \
+                    not any(metric.endswith(suffix) for suffix in metric_suffixes):
+                continue
+            values.setdefault((configuration, metric), []).append(value)
+        return values
+
+    def get_commits(self):
+        """Return the recorded commits ordered by the time of their latest run."""
+        return [commit for commit, in self._connection.execute(
+            "SELECT fairlearn_commit FROM runs GROUP BY fairlearn_commit "
+            "ORDER BY MAX(recorded_at)")]
+
+    def close(self):
+        self._connection.close()
+
+
+def _get_phase(metric, phases):
+    matching_phases = [phase for phase in phases if metric.startswith(phase + "_")]
+    return max(matching_phases, key=len) if matching_phases else ""
+
+
+class Regression:
+    def __init__(self, configuration, metric, baseline_median, candidate_median, p_value):
+        self.configuration = configuration
+        self.metric = metric
+        self.baseline_median = baseline_median
+        self.candidate_median = candidate_median
+        self.p_value = p_value
+
+    @property
+    def relative_change(self):
+        return self.candidate_median / self.baseline_median - 1
+
+    def __repr__(self):
+        return "{} {}: {:.6g} -> {:.6g} ({:+.1%}, p={})" \
+               .format(self.configuration, self.metric, self.baseline_median,
+                       self.candidate_median, self.relative_change,
+                       "n/a" if self.p_value is None else "{:.3g}".format(self.p_value))
+
+
+def detect_regressions(results_store, baseline_commit, candidate_commit, tolerance=0.05,
+                       alpha=0.05, min_samples=3):
+    """Compare the metrics of the candidate commit with those of the baseline commit.
+
+    A metric regressed if its median grew by more than `tolerance` (relative) and a one-sided
+    Mann-Whitney U test rejects the hypothesis that the candidate isn't slower or larger at
+    level `alpha`. If either commit has fewer than `min_samples` values for a metric the test
+    can't reach significance, so only the tolerance is checked and no p-value is reported.
+    """
+    from scipy.stats import mannwhitneyu
+
+    baseline_values = results_store.get_values(baseline_commit)
+    candidate_values = results_store.get_values(candidate_commit)
+
+    regressions = []
+    for key in sorted(set(baseline_values) & set(candidate_values)):
+        configuration, metric = key
+        if not any(metric.endswith(suffix) for suffix in REGRESSION_METRIC_SUFFIXES):
+            continue
+        baseline = _get_samples(baseline_values, configuration, metric)
+        candidate = _get_samples(candidate_values, configuration, metric)
+        baseline_median, candidate_median = median(baseline), median(candidate)
+        if baseline_median <= 0 or candidate_median <= baseline_median * (1 + tolerance):
+            continue
+
+        p_value = None
+        if len(baseline) >= min_samples and len(candidate) >= min_samples:
+            p_value = mannwhitneyu(candidate, baseline, alternative='greater').pvalue
+            if p_value >= alpha:
+                continue
+
+        regressions.append(Regression(configuration, metric, baseline_median, candidate_median,
+                                      p_value))
+    return regressions
+
+
+def _get_samples(values, configuration, metric):
+    # With repeated trials the individual measurements are logged as a list named after the
+    # metric with a trailing "s", which gives a better sample than the per-run medians.
+    return values.get((configuration, metric + "s")) or values[(configuration, metric)]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Detect performance regressions of a fairlearn commit against a baseline "
+                    "commit from the locally stored performance test results.")
+    parser.add_argument("--database", default=os.path.join("perf", "results.sqlite"))
+    parser.add_argument("--baseline", help="baseline fairlearn commit; defaults to the "
+                                           "second most recently recorded commit")
+    parser.add_argument("--candidate", help="candidate fairlearn commit; defaults to the most "
+                                            "recently recorded commit")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    args = parser.parse_args(args)
+
+    results_store = ResultsStore(args.database)
+    commits = results_store.get_commits()
+    candidate = args.candidate or (commits[-1] if commits else None)
+    baseline = args.baseline or (commits[-2] if len(commits) > 1 else None)
+    if candidate is None or baseline is None:
+        print("Need results for two commits to compare, found {}.".format(commits))
+        return 2
+
+    regressions = detect_regressions(results_store, baseline, candidate, args.tolerance,
+                                     args.alpha)
+    print("Comparing fairlearn commit {} against baseline {}".format(candidate, baseline))
+    for regression in regressions:
+        print(regression)
+    print("Found {} regression(s).".format(len(regressions)))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,112 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+import contextlib
 import os
 
 from fairlearn.postprocessing import ThresholdOptimizer
 from fairlearn.reductions import ExponentiatedGradient, GridSearch
 
+from benchmark_spec import CallSpec, Source
+from memory_tracking import MemoryTracking
+from profiled_execution import ProfiledExecution
+from synthetic_dataset import SyntheticDataset
 from timed_execution import TimedExecution
 
 
 _MITIGATION = "mitigation"
 _ESTIMATOR_FIT = 'estimator_fit'
+_PREDICT = 'predict'
+_PMF_PREDICT = 'pmf_predict'
+_STREAMING_PREDICT = 'streaming_predict'
+_IMPORT = 'import'
+_DATASET_LOAD = 'dataset_load'
 
+# prefixes of the metrics logged by the generated scripts
+PHASES = [_IMPORT, _DATASET_LOAD, _ESTIMATOR_FIT, _MITIGATION, _PREDICT, _PMF_PREDICT,
+          _STREAMING_PREDICT]
 
-def generate_script(request, perf_test_configuration, script_name, script_directory, workspace):
-    if not os.path.exists(script_directory):
-        os.makedirs(script_directory)
+# suffixes of the metrics logged by resource_sampling_script.txt
+RESOURCE_SAMPLING_METRIC_SUFFIXES = ["_resource_samples", "_busy_cores_mean", "_busy_cores_max",
+                                     "_core_utilization_mean", "_sampled_rss_max",
+                                     "_threads_max", "_read_bytes", "_write_bytes",
+                                     "resource_samples_path"]
+
+_INFERENCE_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+_STREAMING_CHUNK_SIZES = [1000, 10000, 100000]
+
+# the fairlearn modules that the generated scripts import, and the modules whose import time
+# is tracked, which includes heavy dependencies that fairlearn might import eagerly
+_FAIRLEARN_MODULES = ["fairlearn.postprocessing", "fairlearn.reductions"]
+_IMPORT_TIME_TRACKED_MODULES = ["fairlearn", "fairlearn.postprocessing", "fairlearn.reductions",
+                                "fairlearn.metrics", "sklearn", "scipy", "pandas", "matplotlib",
+                                "matplotlib.pyplot"]
+
+# environment variables that limit the threads of OpenMP and the BLAS implementations
+_THREAD_ENVIRONMENT_VARIABLES = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
 
+# estimators that older versions of scikit-learn only provide after enabling them explicitly
+_EXPERIMENTAL_ESTIMATORS = {"HistGradientBoostingClassifier": "enable_hist_gradient_boosting"}
+
+_MITIGATOR_CLASSES = {mitigator_class.__name__: mitigator_class for mitigator_class in
+                      [ThresholdOptimizer, ExponentiatedGradient, GridSearch]}
+
+
+def generate_script(request, perf_test_configuration, script_name, script_directory, workspace):
     script_lines = []
-    add_imports(script_lines, workspace)
+    add_thread_environment(script_lines, perf_test_configuration)
+    add_imports(script_lines, workspace, perf_test_configuration)
     script_lines.append("")
+    add_run(script_lines, workspace)
     
-    if workspace:
-        script_lines.append("run = Run.get_context()")
-    else:
-        # patch Run class so that we print out metrics if AzureML isn't used.
-        script_lines.append("class Run:")
-        script_lines.append("    def log(self, msg, *args):")
-        script_lines.append("        print(msg, *args)")
-        script_lines.append("    def log_list(self, msg, lst):")
-        script_lines.append("        print(msg, *lst)")
-        script_lines.append("run = Run()")
-    
+    measurement_options = get_measurement_options(request, script_name, workspace)
+    add_script_file(script_lines, "timing_statistics_script.txt")
+    add_script_file(script_lines, "memory_tracking_script.txt")
+    add_script_file(script_lines, "timed_estimator_script.txt")
+    if measurement_options.profiler:
+        add_script_file(script_lines, "profiling_script.txt")
+    add_thread_limits(script_lines, perf_test_configuration)
+    add_resource_sampling_start(script_lines, measurement_options)
+    add_phase_marker(script_lines, _DATASET_LOAD, measurement_options)
     add_dataset_setup(script_lines, perf_test_configuration)
-    add_unconstrained_estimator_fitting(script_lines, perf_test_configuration)
-    add_mitigation(script_lines, perf_test_configuration)
+    add_phase_marker(script_lines, _ESTIMATOR_FIT, measurement_options)
+    add_unconstrained_estimator_fitting(script_lines, perf_test_configuration, measurement_options)
+    add_phase_marker(script_lines, _MITIGATION, measurement_options)
+    add_mitigation(script_lines, perf_test_configuration, measurement_options)
+    add_phase_marker(script_lines, None, measurement_options)
     add_additional_metric_calculation(script_lines, perf_test_configuration)
+    add_phase_marker(script_lines, _PREDICT, measurement_options)
+    add_inference_benchmark(script_lines, perf_test_configuration)
+    add_phase_marker(script_lines, _STREAMING_PREDICT, measurement_options)
+    add_streaming_inference_benchmark(script_lines, measurement_options)
+    add_resource_sampling_stop(script_lines, measurement_options)
     script_lines.append("")
 
     print(f"\n\n{'='*100}\n\n")
+    write_script(script_lines, script_name, script_directory)
+
+
+def generate_import_time_script(request, script_name, script_directory, workspace):
+    """Generate the script that measures the startup of fresh interpreters with the fairlearn
+    imports. The startup doesn't depend on the performance test configurations, so it's
+    measured by a single script per session.
+    """
+    script_lines = []
+    if workspace:
+        script_lines.append('from azureml.core.run import Run')
+    script_lines.append("")
+    add_run(script_lines, workspace)
+    add_script_file(script_lines, "import_time_script.txt")
+    script_lines.append(f"measure_import_time('{_IMPORT}', {_FAIRLEARN_MODULES}, "
+                        f"{_IMPORT_TIME_TRACKED_MODULES}, "
+                        f"warm_runs={request.config.getoption('--import-time-runs')})")
+    script_lines.append("")
+    write_script(script_lines, script_name, script_directory)
+
+
+def write_script(script_lines, script_name, script_directory):
+    if not os.path.exists(script_directory):
+        os.makedirs(script_directory)
 
     full_script_name = os.path.join(script_directory, script_name)
     with open(full_script_name, 'w') as script_file:  # noqa: E501
@@ -46,71 +114,256 @@ def generate_script(request, perf_test_configuration, script_name, script_direct
     print(f"wrote script to {full_script_name}")
 
 
-def add_imports(script_lines, workspace):
-    script_lines.append('from time import time')
-    script_lines.append('from tempeh.configurations import datasets')
-    script_lines.append('from fairlearn.postprocessing import ThresholdOptimizer')
-    script_lines.append('from fairlearn.reductions import ExponentiatedGradient, GridSearch')
-    script_lines.append('from fairlearn.reductions import DemographicParity, EqualizedOdds, ErrorRateParity, TruePositiveRateParity, FalsePositiveRateParity')
-    script_lines.append('from sklearn.svm import SVC')
-    script_lines.append('from sklearn.tree import DecisionTreeClassifier')
+def add_run(script_lines, workspace):
+    if workspace:
+        run_construction = "Run.get_context()"
+    else:
+        # patch Run class so that we print out metrics if AzureML isn't used.
+        # The metrics are also kept on the run so that the local execution engine can
+        # collect them.
+        script_lines.append("class Run:")
+        script_lines.append("    def __init__(self):")
+        script_lines.append("        self.metrics = {}")
+        script_lines.append("    def log(self, msg, *args):")
+        script_lines.append("        print(msg, *args)")
+        script_lines.append("        self.metrics[msg] = args[0] if args else None")
+        script_lines.append("    def log_list(self, msg, lst):")
+        script_lines.append("        print(msg, *lst)")
+        script_lines.append("        self.metrics[msg] = list(lst)")
+        run_construction = "Run()"
+    # scripts that run as part of a shard are provided with the run to log to
+    script_lines.append('if "run" not in globals():')
+    script_lines.append(f"    run = {run_construction}")
+
+
+class MeasurementOptions:
+    """MeasurementOptions holds the options that determine how the phases of a generated
+    script are measured; the defaults measure time and peak RSS once per phase. With
+    `streaming_rows` the prediction is additionally benchmarked on a chunked test set of that
+    many rows. With `resource_sampling_interval` the resource utilization is sampled at that
+    interval in seconds throughout the script.
+    """
+
+    def __init__(self, trace_allocations=False, warmup_iterations=0, trials=1, profiler=None,
+                 profile_directory=None, streaming_rows=0, resource_sampling_interval=0):
+        self.trace_allocations = trace_allocations
+        self.warmup_iterations = warmup_iterations
+        self.trials = trials
+        self.profiler = profiler
+        self.profile_directory = profile_directory
+        self.streaming_rows = streaming_rows
+        self.resource_sampling_interval = resource_sampling_interval
+
+    @property
+    def perturbs_timings(self):
+        """Whether the instrumentation slows down the measured phases, which makes the results
+        incomparable to those of other runs.
+        """
+        return self.profiler is not None or self.trace_allocations or \
+            bool(self.resource_sampling_interval)
+
+
+def get_measurement_options(request, script_name, workspace):
+    # Files in the outputs directory are uploaded to the run by Azure ML. Every script gets its
+    # own directory, since the scripts of a shard share the outputs of one run.
+    output_directory = "outputs" if workspace \
+        else request.config.getoption("--profile-directory")
+    profile_directory = os.path.join(output_directory, os.path.splitext(script_name)[0])
+    return MeasurementOptions(
+        trace_allocations=request.config.getoption("--trace-allocations"),
+        warmup_iterations=request.config.getoption("--warmup-iterations"),
+        trials=request.config.getoption("--trials"),
+        profiler=request.config.getoption("--profile"),
+        profile_directory=profile_directory,
+        streaming_rows=request.config.getoption("--streaming-rows"),
+        resource_sampling_interval=request.config.getoption("--resource-sampling-interval"))
+
+
+def measure(procedure_name, script_lines, measurement_options=None):
+    """Combine the generated instrumentation of a phase. Profiling wraps the timed trials, and
+    memory tracking wraps both so that the peak includes the profiler's own memory.
+    """
+    if measurement_options is None:
+        measurement_options = MeasurementOptions()
+    exit_stack = contextlib.ExitStack()
+    exit_stack.enter_context(MemoryTracking(procedure_name, script_lines,
+                                            measurement_options.trace_allocations))
+    exit_stack.enter_context(ProfiledExecution(procedure_name, script_lines,
+                                               measurement_options.profiler,
+                                               measurement_options.profile_directory))
+    exit_stack.enter_context(TimedExecution(procedure_name, script_lines,
+                                            measurement_options.warmup_iterations,
+                                            measurement_options.trials))
+    return exit_stack
+
+
+def add_imports(script_lines, workspace, perf_test_configuration):
+    if not isinstance(perf_test_configuration.dataset, SyntheticDataset):
+        script_lines.append('from tempeh.configurations import datasets')
+    estimator = perf_test_configuration.estimator
+    import_lines = get_mitigator_spec(perf_test_configuration).import_lines + \
+        estimator.import_lines
+    if estimator.name in _EXPERIMENTAL_ESTIMATORS:
+        import_lines.remove(estimator.import_line)
+        script_lines.append('try:')
+        script_lines.append(f'    {estimator.import_line}')
+        script_lines.append('except ImportError:')
+        script_lines.append(f'    from sklearn.experimental import '
+                            f'{_EXPERIMENTAL_ESTIMATORS[estimator.name]}  # noqa: F401')
+        script_lines.append(f'    {estimator.import_line}')
+    # remove duplicates while keeping the order
+    script_lines.extend(dict.fromkeys(import_lines))
     if workspace:
         script_lines.append('from azureml.core.run import Run')
 
 
+def add_thread_environment(script_lines, perf_test_configuration):
+    # The environment variables only affect libraries that are loaded afterwards, so they need
+    # to be set before any other import.
+    if perf_test_configuration.n_threads is None:
+        return
+    script_lines.append('import os')
+    for variable in _THREAD_ENVIRONMENT_VARIABLES:
+        script_lines.append(f'os.environ["{variable}"] = "{perf_test_configuration.n_threads}"')
+
+
+def add_thread_limits(script_lines, perf_test_configuration):
+    # threadpoolctl also limits the thread pools of libraries that were loaded before the
+    # script started, e.g., in a warm worker of the local execution engine
+    if perf_test_configuration.n_threads is None:
+        return
+    script_lines.append('from threadpoolctl import threadpool_limits')
+    script_lines.append(f'threadpool_limits(limits={perf_test_configuration.n_threads})')
+    script_lines.append(f"run.log('n_threads', {perf_test_configuration.n_threads})")
+    script_lines.append("available_cores = len(os.sched_getaffinity(0)) "
+                        "if hasattr(os, 'sched_getaffinity') else os.cpu_count()")
+    script_lines.append("run.log('available_cores', available_cores)")
+    # more threads than cores measure contention rather than scaling, see thread_scaling.py
+    script_lines.append(f"if {perf_test_configuration.n_threads} > available_cores:")
+    script_lines.append(f"    print('Warning: {perf_test_configuration.n_threads} threads "
+                        "oversubscribe the {} available cores.'.format(available_cores))")
+
+
+def get_mitigator_spec(perf_test_configuration):
+    """Describe the construction of the mitigator in terms of the variables of the generated
+    script and validate the hyperparameters against the installed version of fairlearn.
+    """
+    mitigator = perf_test_configuration.mitigator
+    if mitigator == ThresholdOptimizer.__name__:
+        mitigator_spec = CallSpec(mitigator, "fairlearn.postprocessing",
+                                  estimator=Source("unconstrained_estimator"),
+                                  prefit=True,
+                                  constraints=perf_test_configuration.disparity_metric,
+                                  **perf_test_configuration.mitigator_params)
+    elif mitigator in [ExponentiatedGradient.__name__, GridSearch.__name__]:
+        mitigator_spec = CallSpec(mitigator, "fairlearn.reductions",
+                                  estimator=Source("estimator"),
+                                  constraints=perf_test_configuration.disparity_metric,
+                                  **perf_test_configuration.mitigator_params)
+    else:
+        raise Exception("Unknown mitigation technique.")
+
+    mitigator_spec.validate(_MITIGATOR_CLASSES[mitigator])
+    return mitigator_spec
+
+
+def add_resource_sampling_start(script_lines, measurement_options):
+    if not measurement_options.resource_sampling_interval:
+        return
+    add_script_file(script_lines, "resource_sampling_script.txt")
+    script_lines.append("resource_sampler = start_resource_sampling("
+                        f"{measurement_options.resource_sampling_interval})")
+
+
+def add_phase_marker(script_lines, phase, measurement_options):
+    # tags the following resource samples with the phase; None marks unmeasured code
+    if not measurement_options.resource_sampling_interval:
+        return
+    script_lines.append(f"resource_sampler.set_phase({phase!r})")
+
+
+def add_resource_sampling_stop(script_lines, measurement_options):
+    # the samples are written next to the profiles, i.e., to the outputs of remote runs
+    if not measurement_options.resource_sampling_interval:
+        return
+    script_lines.append("stop_resource_sampling(resource_sampler, "
+                        f"{measurement_options.profile_directory!r})")
+
+
 def add_dataset_setup(script_lines, perf_test_configuration):
-    script_lines.append('print("Downloading dataset")')
-    script_lines.append(f'dataset = datasets["{perf_test_configuration.dataset}"]()')
-    script_lines.append('X_train, X_test = dataset.get_X()')
-    script_lines.append('y_train, y_test = dataset.get_y()')
-    script_lines.append('print("Done downloading dataset")')
+    dataset = perf_test_configuration.dataset
+    if isinstance(dataset, SyntheticDataset):
+        add_synthetic_dataset_setup(script_lines, dataset)
+        return
 
-    if perf_test_configuration.dataset == "adult_uci":
+    if dataset == "adult_uci":
         # sensitive feature is 8th column (sex)
-        script_lines.append('sensitive_features_train = X_train[:, 7]')
-        script_lines.append('sensitive_features_test = X_test[:, 7]')
-    elif perf_test_configuration.dataset == "diabetes_sklearn":
+        sensitive_feature = 7
+    elif dataset == "diabetes_sklearn":
         # sensitive feature is 2nd column (sex)
+        sensitive_feature = 1
+    elif dataset == "compas":
+        # sensitive feature is either race or sex
+        # TODO add another case where we use sex as well, or both (?)
+        sensitive_feature = "race"
+    else:
+        raise ValueError(f"Sensitive features unknown for dataset {dataset}")
+
+    dataset_arguments = f'"{dataset}", {sensitive_feature!r}'
+    add_script_file(script_lines, "dataset_cache_script.txt")
+    script_lines.append('print("Loading dataset")')
+    script_lines.append('X_train, X_test, y_train, y_test, '
+                        'sensitive_features_train, sensitive_features_test = '
+                        f'load_cached_dataset(dataset_cache_key({dataset_arguments}), '
+                        f'lambda: load_tempeh_dataset({dataset_arguments}))')
+    script_lines.append('print("Done loading dataset")')
+
+    if dataset == "diabetes_sklearn":
         # features have been scaled, but sensitive feature needs to be str or int
-        script_lines.append('sensitive_features_train = X_train[:, 1].astype(str)')
-        script_lines.append('sensitive_features_test = X_test[:, 1].astype(str)')
+        script_lines.append('sensitive_features_train = sensitive_features_train.astype(str)')
+        script_lines.append('sensitive_features_test = sensitive_features_test.astype(str)')
         # labels can't be floats as of now
         script_lines.append('y_train = y_train.astype(int)')
         script_lines.append('y_test = y_test.astype(int)')
-    elif perf_test_configuration.dataset == "compas":
-        # sensitive feature is either race or sex
-        # TODO add another case where we use sex as well, or both (?)
-        script_lines.append('sensitive_features_train, sensitive_features_test = dataset.get_sensitive_features("race")')
+    elif dataset == "compas":
         script_lines.append('y_train = y_train.astype(int)')
         script_lines.append('y_test = y_test.astype(int)')
-    else:
-        raise ValueError(f"Sensitive features unknown for dataset {perf_test_configuration.dataset}")
 
 
-def add_unconstrained_estimator_fitting(script_lines, perf_test_configuration):
-    with TimedExecution(_ESTIMATOR_FIT, script_lines):
-        script_lines.append(f'estimator = {perf_test_configuration.estimator}')
-        script_lines.append(f'unconstrained_estimator = {perf_test_configuration.estimator}')
-        script_lines.append('unconstrained_estimator.fit(X_train, y_train)')
+def add_synthetic_dataset_setup(script_lines, dataset):
+    add_script_file(script_lines, "dataset_cache_script.txt")
+    add_script_file(script_lines, "synthetic_dataset_script.txt")
+    script_lines.append('print("Loading dataset")')
+    script_lines.append('X_train, X_test, y_train, y_test, '
+                        'sensitive_features_train, sensitive_features_test = '
+                        'load_cached_dataset('
+                        f'dataset_cache_key("{dataset.cache_name}", "group", {dataset.seed}), '
+                        'lambda: make_synthetic_dataset('
+                        f'n_samples={dataset.n_samples}, '
+                        f'n_features={dataset.n_features}, '
+                        f'n_groups={dataset.n_groups}, '
+                        f'positive_rate={dataset.positive_rate}, '
+                        f'seed={dataset.seed}))')
+    script_lines.append('print("Done loading dataset")')
 
 
-def add_mitigation(script_lines, perf_test_configuration):
-    with TimedExecution(_MITIGATION, script_lines):
-        if perf_test_configuration.mitigator == ThresholdOptimizer.__name__:
-            script_lines.append('mitigator = ThresholdOptimizer('
-                                'estimator=unconstrained_estimator, '
-                                'prefit=True, '
-                                f'constraints={perf_test_configuration.disparity_metric})')
-        elif perf_test_configuration.mitigator in [
-                ExponentiatedGradient.__name__,
-                GridSearch.__name__]:
-            script_lines.append(f'mitigator = {perf_test_configuration.mitigator}('
-                                'estimator=estimator, '
-                                f'constraints={perf_test_configuration.disparity_metric})')
-        else:
-            raise Exception("Unknown mitigation technique.")
+def add_unconstrained_estimator_fitting(script_lines, perf_test_configuration,
+                                        measurement_options=None):
+    with measure(_ESTIMATOR_FIT, script_lines, measurement_options):
+        # the estimators are wrapped so that the calls that the mitigators make are timed
+        script_lines.append(f'estimator = TimedEstimator({perf_test_configuration.estimator!r})')
+        script_lines.append('unconstrained_estimator = '
+                            f'TimedEstimator({perf_test_configuration.estimator!r})')
+        script_lines.append('unconstrained_estimator.fit(X_train, y_train)')
+
 
+def add_mitigation(script_lines, perf_test_configuration, measurement_options=None):
+    with measure(_MITIGATION, script_lines, measurement_options):
+        script_lines.append('TimedEstimator.reset()')
+        script_lines.append(f'mitigator = {get_mitigator_spec(perf_test_configuration)!r}')
         script_lines.append('mitigator.fit(X_train, y_train, sensitive_features=sensitive_features_train)')
+    # the estimator calls of the last trial are copied before the prediction below adds its own
+    script_lines.append('mitigation_estimator_calls = list(TimedEstimator.calls)')
 
     if perf_test_configuration.mitigator == ThresholdOptimizer.__name__:
         script_lines.append('mitigator.predict('
@@ -125,22 +378,59 @@ def add_additional_metric_calculation(script_lines, perf_test_configuration):
     # In certain mitigation methods we re-run the estimators many times.
     # For that reason we need metrics to compare the mitigation time with the time that the
     # estimators took since Fairlearn only controls the mitigation overhead and not the estimator
-    # training time.
+    # training time. The calls to the estimators are recorded by TimedEstimator.
     if perf_test_configuration.mitigator in [
             ExponentiatedGradient.__name__,
             GridSearch.__name__]:
-        add_metric_logging_script(script_lines, "metric_logging_script_expgrad_gridsearch.txt")
+        add_script_file(script_lines, "metric_logging_script_expgrad_gridsearch.txt")
     elif perf_test_configuration.mitigator in [ThresholdOptimizer.__name__]:
-        add_metric_logging_script(script_lines, "metric_logging_script_postprocessing.txt")
+        add_script_file(script_lines, "metric_logging_script_postprocessing.txt")
+
+
+def add_inference_benchmark(script_lines, perf_test_configuration):
+    add_script_file(script_lines, "inference_benchmark_script.txt")
+    # The estimator calls were already analyzed. Recording stays off for the rest of the script,
+    # so that the benchmarks don't measure the recording and the calls don't pile up.
+    script_lines.append('TimedEstimator.reset()')
+    script_lines.append('TimedEstimator.enabled = False')
+    if perf_test_configuration.mitigator == ThresholdOptimizer.__name__:
+        # the randomized prediction of ThresholdOptimizer depends on the sensitive features
+        script_lines.append('predict = lambda X, sensitive_features: mitigator.predict('
+                            'X, sensitive_features=sensitive_features, random_state=1)')
+        script_lines.append('pmf_predict = lambda X, sensitive_features: mitigator._pmf_predict('
+                            'X, sensitive_features=sensitive_features)')
+    else:
+        script_lines.append('predict = lambda X, sensitive_features: mitigator.predict(X)')
+        script_lines.append('pmf_predict = lambda X, sensitive_features: '
+                            'mitigator._pmf_predict(X)')
+
+    script_lines.append(f"benchmark_inference('{_PREDICT}', predict, X_test, "
+                        f"sensitive_features_test, {_INFERENCE_BATCH_SIZES})")
+    # not every mitigator implements _pmf_predict
+    script_lines.append("if hasattr(mitigator, '_pmf_predict'):")
+    script_lines.append(f"    benchmark_inference('{_PMF_PREDICT}', pmf_predict, X_test, "
+                        f"sensitive_features_test, {_INFERENCE_BATCH_SIZES})")
+
 
+def add_streaming_inference_benchmark(script_lines, measurement_options):
+    if not measurement_options.streaming_rows:
+        return
+    add_script_file(script_lines, "streaming_inference_script.txt")
+    # the chunks are read from a file that is larger than the test set, so only predict is
+    # benchmarked, which is what a scoring pipeline calls
+    script_lines.append(f"benchmark_streaming_inference('{_STREAMING_PREDICT}', predict, X_test, "
+                        f"sensitive_features_test, {measurement_options.streaming_rows}, "
+                        f"{_STREAMING_CHUNK_SIZES})")
 
-def add_metric_logging_script(script_lines, metric_logging_script_file_name):
+
+def add_script_file(script_lines, script_file_name):
     skip_lines = [
-        "# Copyright (c) Microsoft Corporation. All rights reserved."
+        "# Copyright (c) Microsoft Corporation. All rights reserved.",
         "# Licensed under the MIT License."
     ]
     script_directory = os.path.dirname(__file__)
-    with open(os.path.join(script_directory, metric_logging_script_file_name), 'r') as metric_logging_script_file:
-        for line in metric_logging_script_file.readlines():
+    with open(os.path.join(script_directory, script_file_name), 'r') as script_file:
+        for line in script_file.read().splitlines():
             if line not in skip_lines:
-                script_lines.append(line.replace("\n", ""))
+                script_lines.append(line)
+    script_lines.append("")
@@ -0,0 +1,71 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Runs several generated performance test scripts sequentially within a single job.
+
+The scripts to run are listed in a JSON manifest `{"scripts": ["1234.py", ...]}`. When run on
+Azure Machine Learning every script gets its own child run, so the metrics of each
+configuration are streamed back as soon as the script logs them.
+
+A script that fails only fails its child run. The shard itself exits successfully once it ran
+every script, so that only infrastructure failures make the orchestrator retry the whole shard.
+"""
+
+import argparse
+import json
+import runpy
+import sys
+import traceback
+
+
+def run_shard(script_names, parent_run=None):
+    failed_script_names = []
+    for script_name in script_names:
+        print("Starting {}".format(script_name))
+        child_run = None
+        init_globals = {}
+        if parent_run is not None:
+            child_run = parent_run.child_run(name=script_name)
+            child_run.tag("script", script_name)
+            # the generated scripts only create their own run if none is provided
+            init_globals["run"] = child_run
+        try:
+            runpy.run_path(script_name, init_globals=init_globals, run_name="__main__")
+        except Exception:  # noqa: B902
+            traceback.print_exc()
+            failed_script_names.append(script_name)
+            if child_run is not None:
+                child_run.fail()
+        else:
+            if child_run is not None:
+                child_run.complete()
+        print("Finished {}".format(script_name))
+    return failed_script_names
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--manifest", required=True)
+    args = parser.parse_args(args)
+
+    with open(args.manifest, 'r') as manifest_file:
+        script_names = json.load(manifest_file)["scripts"]
+
+    try:
+        from azureml.core.run import Run
+        parent_run = Run.get_context()
+        if parent_run.id.startswith("OfflineRun"):
+            # outside of Azure ML there are no child runs
+            parent_run = None
+    except ImportError:
+        parent_run = None
+
+    failed_script_names = run_shard(script_names, parent_run)
+    if failed_script_names:
+        # the failures are reported by the child runs, retrying the shard wouldn't fix them
+        print("Failed scripts: {}".format(", ".join(failed_script_names)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
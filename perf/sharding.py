@@ -0,0 +1,129 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Utilities to pack many performance test scripts into a few shards that each run as a single
+job, so that environment resolution, container start and node spin-up are paid once per shard
+instead of once per configuration.
+"""
+
+import abc
+import json
+import os
+import re
+import shutil
+
+
+_SHARD_RUNNER = "shard_runner.py"
+
+# The total times of the phases that make up the cost of a script. Other execution times, e.g.,
+# those of the oracle calls, are part of these totals and would be counted twice.
+_COST_METRICS = ["estimator_fit_execution_time", "mitigation_execution_time"]
+_COST_METRIC_PATTERN = re.compile(r"^streaming_predict_chunk_\d+_execution_time$")
+
+
+class Shard:
+    def __init__(self, index, script_names):
+        self.index = index
+        self.script_names = script_names
+
+    def __repr__(self):
+        return "[shard: {}, scripts: {}]".format(self.index, len(self.script_names))
+
+
+def pack_shards(script_names, n_shards, costs=None):
+    """Distribute the scripts over at most `n_shards` shards such that the shards' total
+    estimated costs are balanced, using the longest-processing-time-first heuristic.
+
+    `costs` maps script names to their estimated cost; scripts without an estimate get the
+    median of the known estimates.
+    """
+    if n_shards < 1:
+        raise ValueError("At least one shard is required, got {}.".format(n_shards))
+
+    costs = costs or {}
+    known_costs = sorted(costs[script_name] for script_name in script_names
+                         if script_name in costs)
+    default_cost = known_costs[len(known_costs) // 2] if known_costs else 1
+    estimated_costs = {script_name: costs.get(script_name, default_cost)
+                       for script_name in script_names}
+
+    shards = [Shard(index, []) for index in range(min(n_shards, len(script_names)))]
+    shard_costs = [0] * len(shards)
+    for script_name in sorted(script_names, key=lambda name: estimated_costs[name],
+                              reverse=True):
+        cheapest_shard = shard_costs.index(min(shard_costs))
+        shards[cheapest_shard].script_names.append(script_name)
+        shard_costs[cheapest_shard] += estimated_costs[script_name]
+    return shards
+
+
+def get_cost_estimates(results_store, configurations_by_script_name):
+    """Estimate the cost of every script from the time that the phases of its configuration
+    took in the most recently recorded run.
+    """
+    commits = results_store.get_commits()
+    if not commits:
+        return {}
+    values = results_store.get_values(commits[-1], metric_suffixes=["_execution_time"])
+    costs = {}
+    for script_name, configuration in configurations_by_script_name.items():
+        execution_times = [metric_values[-1] for (recorded_configuration, metric), metric_values
+                           in values.items() if recorded_configuration == configuration and
+                           (metric in _COST_METRICS or _COST_METRIC_PATTERN.match(metric))]
+        if execution_times:
+            costs[script_name] = sum(execution_times)
+    return costs
+
+
+class ShardBackend(abc.ABC):
+    """ShardBackend is the interface of the backends that execute shards.
+
+    `submit` starts the execution of a shard and returns a handle, which the corresponding
+    `Job` of the orchestration module waits for and collects the results from.
+    """
+
+    @abc.abstractmethod
+    def submit(self, shard, script_directory):
+        pass
+
+
+class LocalShardBackend(ShardBackend):
+    """LocalShardBackend runs every shard sequentially on one worker of a
+    `LocalExecutionEngine`, which makes it an offline stand-in for the remote backend.
+    """
+
+    def __init__(self, local_execution_engine):
+        self.local_execution_engine = local_execution_engine
+
+    def submit(self, shard, script_directory):
+        script_paths = [os.path.join(script_directory, script_name)
+                        for script_name in shard.script_names]
+        return self.local_execution_engine.submit_shard(script_paths)
+
+
+class AzureMLShardBackend(ShardBackend):
+    """AzureMLShardBackend submits every shard as a single Azure ML run that executes the
+    shard's scripts with shard_runner.py. The environment is configured and registered once
+    for all shards, and every script reports its metrics to its own child run.
+    """
+
+    def __init__(self, experiment, run_config):
+        self.experiment = experiment
+        self.run_config = run_config
+
+    def submit(self, shard, script_directory):
+        from azureml.core import ScriptRunConfig
+
+        manifest_name = "shard_{}.json".format(shard.index)
+        with open(os.path.join(script_directory, manifest_name), 'w') as manifest_file:
+            json.dump({"scripts": shard.script_names}, manifest_file)
+        shutil.copy(os.path.join(os.path.dirname(__file__), _SHARD_RUNNER),
+                    os.path.join(script_directory, _SHARD_RUNNER))
+
+        script_run_config = ScriptRunConfig(source_directory=script_directory,
+                                            script=_SHARD_RUNNER,
+                                            arguments=["--manifest", manifest_name],
+                                            run_config=self.run_config)
+        return self.experiment.submit(config=script_run_config,
+                                      tags={"shard": str(shard.index),
+                                            "scripts": str(len(shard.script_names))})
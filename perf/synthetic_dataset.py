@@ -0,0 +1,84 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Synthetic datasets with a configurable number of samples, features, sensitive feature groups
+and label imbalance, which are used to determine how the mitigation techniques scale.
+"""
+
+import math
+
+SYNTHETIC = 'synthetic'
+
+# base point of the scalability sweep; every axis is varied while the others are kept at
+# their base value
+_BASE_N_SAMPLES = 10000
+_BASE_N_FEATURES = 20
+_BASE_N_GROUPS = 2
+_BASE_POSITIVE_RATE = 0.5
+
+
+class SyntheticDataset:
+    def __init__(self, n_samples, n_features, n_groups, positive_rate=0.5, seed=0):
+        if n_groups < 2:
+            raise ValueError("At least two sensitive feature groups are required.")
+        if not 0 < positive_rate < 1:
+            raise ValueError("The positive rate needs to be in (0, 1), got {}."
+                             .format(positive_rate))
+
+        self.n_samples = n_samples
+        self.n_features = n_features
+        self.n_groups = n_groups
+        self.positive_rate = positive_rate
+        self.seed = seed
+
+    @property
+    def cache_name(self):
+        return "{}_n{}_f{}_g{}_p{}".format(SYNTHETIC, self.n_samples, self.n_features,
+                                           self.n_groups, self.positive_rate)
+
+    def __repr__(self):
+        return "{}(n_samples={}, n_features={}, n_groups={}, positive_rate={})" \
+               .format(SYNTHETIC, self.n_samples, self.n_features, self.n_groups,
+                       self.positive_rate)
+
+
+def log_scale(start, stop, num, base=10):
+    """Return `num` integers between `start` and `stop` that are evenly spaced on a log scale."""
+    if num == 1:
+        return [start]
+    log_start, log_stop = math.log(start, base), math.log(stop, base)
+    step = (log_stop - log_start) / (num - 1)
+    return sorted({int(round(base ** (log_start + i * step))) for i in range(num)})
+
+
+def get_base_dataset(n_groups=_BASE_N_GROUPS):
+    """Return the base point of the scalability sweep with `n_groups` sensitive feature
+    groups.
+    """
+    return SyntheticDataset(_BASE_N_SAMPLES, _BASE_N_FEATURES, n_groups, _BASE_POSITIVE_RATE)
+
+
+def get_scalability_datasets():
+    """Return the synthetic datasets of the scalability sweep, which varies one axis at a time
+    on a log scale around a common base point.
+    """
+    datasets = [SyntheticDataset(_BASE_N_SAMPLES, _BASE_N_FEATURES, _BASE_N_GROUPS,
+                                 _BASE_POSITIVE_RATE)]
+    for n_samples in log_scale(1000, 1000000, 4):
+        datasets.append(SyntheticDataset(n_samples, _BASE_N_FEATURES, _BASE_N_GROUPS,
+                                         _BASE_POSITIVE_RATE))
+    for n_features in log_scale(10, 1000, 3):
+        datasets.append(SyntheticDataset(_BASE_N_SAMPLES, n_features, _BASE_N_GROUPS,
+                                         _BASE_POSITIVE_RATE))
+    for n_groups in log_scale(2, 128, 4, base=2):
+        datasets.append(SyntheticDataset(_BASE_N_SAMPLES, _BASE_N_FEATURES, n_groups,
+                                         _BASE_POSITIVE_RATE))
+    for positive_rate in [0.1, 0.01]:
+        datasets.append(SyntheticDataset(_BASE_N_SAMPLES, _BASE_N_FEATURES, _BASE_N_GROUPS,
+                                         positive_rate))
+
+    # remove the duplicates of the base point
+    unique_datasets = {}
+    for dataset in datasets:
+        unique_datasets.setdefault(repr(dataset), dataset)
+    return list(unique_datasets.values())
@@ -0,0 +1,69 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from benchmark_spec import CallSpec, Source
+
+
+class Estimator:
+    def __init__(self, alpha=1.0, max_iter=100):
+        pass
+
+
+class FlexibleEstimator:
+    def __init__(self, alpha=1.0, **kwargs):
+        pass
+
+
+def test_to_source_renders_arguments_with_repr():
+    call_spec = CallSpec("Estimator", "estimators", alpha=0.5, solver="lbfgs", n_jobs=None)
+
+    assert call_spec.to_source() == "Estimator(alpha=0.5, solver='lbfgs', n_jobs=None)"
+    assert repr(call_spec) == call_spec.to_source()
+
+
+def test_to_source_renders_nested_calls_and_sources():
+    constraints = CallSpec("DemographicParity", "fairlearn.reductions", difference_bound=0.01)
+    mitigator = CallSpec("ExponentiatedGradient", "fairlearn.reductions",
+                         estimator=Source("estimator"), constraints=constraints)
+
+    assert mitigator.to_source() == "ExponentiatedGradient(estimator=estimator, " \
+        "constraints=DemographicParity(difference_bound=0.01))"
+
+
+def test_to_source_without_arguments():
+    assert CallSpec("Estimator", "estimators").to_source() == "Estimator()"
+
+
+def test_import_lines_include_the_nested_calls():
+    mitigator = CallSpec("GridSearch", "fairlearn.reductions",
+                         estimator=CallSpec("LogisticRegression", "sklearn.linear_model"),
+                         constraints=CallSpec("EqualizedOdds", "fairlearn.reductions"),
+                         grid_size=10)
+
+    assert mitigator.import_lines == ["from fairlearn.reductions import GridSearch",
+                                      "from sklearn.linear_model import LogisticRegression",
+                                      "from fairlearn.reductions import EqualizedOdds"]
+
+
+def test_with_params_returns_a_copy():
+    call_spec = CallSpec("Estimator", "estimators", alpha=0.5)
+
+    updated_call_spec = call_spec.with_params(alpha=0.1, max_iter=10)
+
+    assert updated_call_spec == CallSpec("Estimator", "estimators", alpha=0.1, max_iter=10)
+    assert call_spec.params == {"alpha": 0.5}
+
+
+def test_validate_accepts_known_arguments():
+    CallSpec("Estimator", "estimators", alpha=0.5, max_iter=10).validate(Estimator)
+
+
+def test_validate_rejects_unknown_arguments():
+    with pytest.raises(ValueError, match="beta, gamma"):
+        CallSpec("Estimator", "estimators", gamma=1, alpha=0.5, beta=2).validate(Estimator)
+
+
+def test_validate_accepts_any_argument_with_var_keyword():
+    CallSpec("FlexibleEstimator", "estimators", beta=2).validate(FlexibleEstimator)
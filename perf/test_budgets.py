@@ -0,0 +1,74 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+import pytest
+
+from budgets import Budgets, propose_budgets
+from results_store import ResultsStore
+
+CONFIGURATION = "[dataset: adult_uci]"
+
+
+@pytest.fixture
+def budgets():
+    return Budgets({CONFIGURATION: {"mitigation_execution_time": 10.0,
+                                    "mitigation_peak_rss": 1000.0}},
+                   tolerance=0.1)
+
+
+def test_check_reports_metrics_beyond_the_tolerance(budgets):
+    violations = budgets.check(CONFIGURATION, {"mitigation_execution_time": 11.5,
+                                               "mitigation_peak_rss": 900.0})
+
+    assert [(violation.metric, violation.value, violation.budget)
+            for violation in violations] == [("mitigation_execution_time", 11.5, 10.0)]
+
+
+def test_check_accepts_metrics_within_the_tolerance(budgets):
+    assert budgets.check(CONFIGURATION, {"mitigation_execution_time": 10.9,
+                                         "mitigation_peak_rss": 1100.0}) == []
+
+
+def test_check_with_a_different_tolerance(budgets):
+    violations = budgets.check(CONFIGURATION, {"mitigation_execution_time": 10.5}, tolerance=0)
+
+    assert [violation.metric for violation in violations] == ["mitigation_execution_time"]
+    assert violations[0].tolerance == 0
+
+
+def test_check_uses_the_median_of_trials(budgets):
+    assert budgets.check(CONFIGURATION,
+                         {"mitigation_execution_time": [9.0, 10.0, 30.0]}) == []
+
+
+def test_check_skips_unmeasured_metrics_and_configurations(budgets):
+    assert budgets.check(CONFIGURATION, {}) == []
+    assert budgets.check("[other configuration]", {"mitigation_execution_time": 100.0}) == []
+
+
+def test_save_and_load(budgets, tmp_path):
+    budgets_path = os.path.join(str(tmp_path), "budgets.json")
+    budgets.version = 3
+
+    budgets.save(budgets_path)
+    loaded_budgets = Budgets.load(budgets_path)
+
+    assert loaded_budgets.budgets == budgets.budgets
+    assert loaded_budgets.tolerance == budgets.tolerance
+    assert loaded_budgets.version == 3
+
+
+def test_propose_budgets_from_the_largest_recent_median():
+    results_store = ResultsStore(":memory:")
+    for commit, values in [("first", [8.0, 10.0, 12.0]), ("second", [9.0])]:
+        for value in values:
+            results_store.record(commit, CONFIGURATION, {"mitigation_execution_time": value,
+                                                         "predict_latency_p50": value})
+
+    proposed_budgets = propose_budgets(results_store, history=2, headroom=0.2)
+    results_store.close()
+
+    # metrics that aren't budgeted are left out
+    assert proposed_budgets == {CONFIGURATION: {"mitigation_execution_time": 12.0}}
@@ -0,0 +1,66 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from hyperparameter_sampling import Axis, LATIN_HYPERCUBE, ONE_AT_A_TIME, \
+    sample_hyperparameters, sample_latin_hypercube, sample_one_at_a_time
+
+AXES = [Axis("eps", [0.001, 0.005, 0.01, 0.05, 0.1], 0.01),
+        Axis("max_iter", [10, 25, 50, 100, 200], 50),
+        Axis("grid_size", [5, 10, 20, 50, 100], 10)]
+
+
+def test_sample_latin_hypercube_hits_every_stratum_once():
+    # with as many samples as levels every level is a stratum of its own
+    points = sample_latin_hypercube(AXES, 5)
+
+    assert len(points) == 5
+    for axis in AXES:
+        assert sorted(point[axis.name] for point in points) == sorted(axis.levels)
+
+
+def test_sample_latin_hypercube_is_reproducible():
+    assert sample_latin_hypercube(AXES, 5, seed=1) == sample_latin_hypercube(AXES, 5, seed=1)
+    assert sample_latin_hypercube(AXES, 5, seed=1) != sample_latin_hypercube(AXES, 5, seed=2)
+
+
+def test_sample_latin_hypercube_covers_every_level_with_more_samples_than_levels():
+    points = sample_latin_hypercube(AXES, 20)
+
+    for axis in AXES:
+        assert set(point[axis.name] for point in points) == set(axis.levels)
+
+
+def test_sample_latin_hypercube_removes_duplicate_points():
+    points = sample_latin_hypercube([Axis("nu", [None, 1e-6], None)], 10)
+
+    assert sorted(points, key=repr) == [{"nu": 1e-06}, {"nu": None}]
+
+
+def test_sample_latin_hypercube_requires_a_sample():
+    with pytest.raises(ValueError):
+        sample_latin_hypercube(AXES, 0)
+
+
+def test_sample_one_at_a_time_varies_one_axis_from_the_defaults():
+    points = sample_one_at_a_time(AXES)
+
+    default_point = {"eps": 0.01, "max_iter": 50, "grid_size": 10}
+    assert points[0] == default_point
+    # every level of every axis except for the defaults, which are covered by the first point
+    assert len(points) == 1 + sum(len(axis.levels) - 1 for axis in AXES)
+    for point in points[1:]:
+        assert sum(point[name] != default for name, default in default_point.items()) == 1
+
+
+def test_sample_hyperparameters_dispatches_on_the_method():
+    assert sample_hyperparameters(AXES, LATIN_HYPERCUBE, 5) == sample_latin_hypercube(AXES, 5)
+    assert sample_hyperparameters(AXES, ONE_AT_A_TIME, 5) == sample_one_at_a_time(AXES)
+    with pytest.raises(ValueError):
+        sample_hyperparameters(AXES, "grid", 5)
+
+
+def test_axis_requires_the_default_among_its_levels():
+    with pytest.raises(ValueError):
+        Axis("eps", [0.01, 0.1], 0.05)
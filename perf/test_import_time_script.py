@@ -0,0 +1,50 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+import pytest
+
+IMPORT_TIME_REPORT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |       2500 |     numpy.core
+import time:      3000 |      10000 |   numpy
+import time:       800 |     250000 | fairlearn.postprocessing
+some other output on stderr
+"""
+
+
+@pytest.fixture(scope="module")
+def import_time_script():
+    # the helpers are inlined into the generated script, so they're loaded the same way
+    script_globals = {}
+    with open(os.path.join(os.path.dirname(__file__), "import_time_script.txt"), 'r') \
+            as script_file:
+        exec(script_file.read(), script_globals)
+    return script_globals
+
+
+def test_parse_import_times(import_time_script):
+    import_times = import_time_script["parse_import_times"](IMPORT_TIME_REPORT)
+
+    assert import_times == {
+        "_io": (0.00012, 0.00012),
+        "numpy.core": (0.0015, 0.0025),
+        "numpy": (0.003, 0.01),
+        "fairlearn.postprocessing": (0.0008, 0.25),
+    }
+
+
+def test_parse_import_times_of_an_empty_report(import_time_script):
+    assert import_time_script["parse_import_times"]("") == {}
+
+
+def test_parse_import_times_of_a_fresh_interpreter(import_time_script):
+    _, import_time_report = import_time_script["run_interpreter"]("import json",
+                                                                  import_time=True)
+
+    import_times = import_time_script["parse_import_times"](import_time_report)
+
+    assert "json" in import_times
+    self_time, cumulative_time = import_times["json"]
+    assert 0 <= self_time <= cumulative_time
@@ -0,0 +1,43 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+import pytest
+
+from local_execution import LocalExecutionEngine
+
+
+@pytest.fixture
+def script_directory(tmp_path):
+    for script_name, source in [("ok.py", "print('ok')\n"),
+                                ("error.py", "raise ValueError('broken')\n"),
+                                ("crash.py", "import os\nos._exit(1)\n")]:
+        with open(os.path.join(str(tmp_path), script_name), 'w') as script_file:
+            script_file.write(source)
+    return str(tmp_path)
+
+
+def test_engine_reports_the_errors_of_scripts(script_directory):
+    with LocalExecutionEngine(workers=2, pin_cores=False) as engine:
+        futures = [engine.submit(os.path.join(script_directory, script_name))
+                   for script_name in ["ok.py", "error.py"]]
+        ok_result, error_result = [future.result(timeout=60) for future in futures]
+
+    assert ok_result.succeeded
+    assert ok_result.output.strip() == "ok"
+    assert "broken" in error_result.error
+
+
+def test_engine_survives_a_worker_that_dies(script_directory):
+    script_paths = [os.path.join(script_directory, script_name)
+                    for script_name in ["crash.py", "ok.py"]]
+
+    with LocalExecutionEngine(workers=1, pin_cores=False) as engine:
+        shard_results = engine.submit_shard(script_paths).result(timeout=120)
+        later_result = engine.submit(script_paths[1]).result(timeout=60)
+
+    crash_result, ok_result = shard_results
+    assert "worker process died" in crash_result.error
+    assert ok_result.succeeded
+    assert later_result.succeeded
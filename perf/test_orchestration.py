@@ -0,0 +1,146 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import threading
+
+import pytest
+
+from local_execution import ScriptResult
+from orchestration import COMPLETED, FAILED, RUNNING, TIMED_OUT, Job, Orchestrator
+
+SUBMIT_ERROR = "submit error"
+
+
+class FakeJob(Job):
+    """FakeJob ends every attempt with the next of the given outcomes, which is a status, or
+    SUBMIT_ERROR to fail the submission. RUNNING never ends, so the attempt times out.
+    """
+
+    def __init__(self, name, outcomes):
+        self.name = name
+        self.script_names = [name]
+        self.outcomes = outcomes
+        self.attempts = 0
+        self.canceled_handles = []
+
+    def submit(self):
+        attempt = self.attempts
+        self.attempts += 1
+        if self.outcomes[attempt] == SUBMIT_ERROR:
+            raise RuntimeError("submission failed")
+        return attempt
+
+    def get_status(self, handle):
+        return self.outcomes[handle]
+
+    def collect(self, handle):
+        return {self.name: ScriptResult(self.name, "", {"attempt": handle},
+                                        None if self.outcomes[handle] == COMPLETED
+                                        else "failed")}
+
+    def cancel(self, handle):
+        self.canceled_handles.append(handle)
+
+
+def run_jobs(jobs, **orchestrator_arguments):
+    orchestrator_arguments.setdefault("poll_interval", 0)
+    return Orchestrator(**orchestrator_arguments).run(jobs)
+
+
+def test_orchestrator_collects_completed_jobs():
+    jobs = [FakeJob("a.py", [COMPLETED]), FakeJob("b.py", [COMPLETED])]
+
+    script_results, job_records = run_jobs(jobs)
+
+    assert sorted(script_results) == ["a.py", "b.py"]
+    assert all(script_result.succeeded for script_result in script_results.values())
+    assert [(job_record.name, job_record.status, job_record.attempts)
+            for job_record in job_records] == [("a.py", COMPLETED, 1), ("b.py", COMPLETED, 1)]
+
+
+def test_orchestrator_retries_failed_jobs():
+    job = FakeJob("a.py", [FAILED, COMPLETED])
+
+    script_results, job_records = run_jobs([job], retries=1)
+
+    assert script_results["a.py"].succeeded
+    assert script_results["a.py"].metrics == {"attempt": 1}
+    assert (job_records[0].status, job_records[0].attempts) == (COMPLETED, 2)
+
+
+def test_orchestrator_gives_up_after_the_retries():
+    job = FakeJob("a.py", [FAILED, FAILED, COMPLETED])
+
+    script_results, job_records = run_jobs([job], retries=1)
+
+    assert not script_results["a.py"].succeeded
+    assert (job_records[0].status, job_records[0].attempts) == (FAILED, 2)
+    assert job.attempts == 2
+
+
+def test_orchestrator_cancels_and_retries_jobs_that_time_out():
+    job = FakeJob("a.py", [RUNNING, COMPLETED])
+
+    script_results, job_records = run_jobs([job], timeout=0.1, retries=1)
+
+    assert job.canceled_handles == [0]
+    assert script_results["a.py"].succeeded
+    assert (job_records[0].status, job_records[0].attempts) == (COMPLETED, 2)
+
+
+def test_orchestrator_reports_jobs_that_keep_timing_out():
+    job = FakeJob("a.py", [RUNNING, RUNNING])
+
+    script_results, job_records = run_jobs([job], timeout=0.1, retries=1)
+
+    assert job.canceled_handles == [0, 1]
+    assert TIMED_OUT in script_results["a.py"].error
+    assert (job_records[0].status, job_records[0].attempts) == (TIMED_OUT, 2)
+
+
+def test_orchestrator_retries_failed_submissions():
+    job = FakeJob("a.py", [SUBMIT_ERROR, COMPLETED])
+
+    script_results, job_records = run_jobs([job], retries=1)
+
+    assert script_results["a.py"].succeeded
+    assert (job_records[0].status, job_records[0].attempts) == (COMPLETED, 2)
+
+
+def test_orchestrator_fills_in_results_of_scripts_that_never_reported():
+    job = FakeJob("shard_0", [FAILED])
+    job.script_names = ["a.py", "b.py"]
+
+    script_results, _ = run_jobs([job], retries=0)
+
+    assert not script_results["a.py"].succeeded
+    assert not script_results["b.py"].succeeded
+
+
+def test_orchestrator_limits_the_concurrent_jobs():
+    lock = threading.Lock()
+    running_jobs = []
+    max_running_jobs = []
+
+    class CountingJob(FakeJob):
+        def submit(self):
+            with lock:
+                running_jobs.append(self.name)
+                max_running_jobs.append(len(running_jobs))
+            return super().submit()
+
+        def collect(self, handle):
+            with lock:
+                running_jobs.remove(self.name)
+            return super().collect(handle)
+
+    jobs = [CountingJob("{}.py".format(index), [COMPLETED]) for index in range(6)]
+
+    run_jobs(jobs, max_concurrent_jobs=2)
+
+    assert max(max_running_jobs) <= 2
+
+
+def test_orchestrator_requires_a_concurrent_job():
+    with pytest.raises(ValueError):
+        Orchestrator(max_concurrent_jobs=0)
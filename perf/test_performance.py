@@ -1,22 +1,24 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+import hashlib
 import logging
 import os
 import pytest
-import subprocess
 
-from conftest import get_all_perf_test_configurations
+from conftest import ImportTimeConfiguration, get_all_perf_test_configurations
 from environment_setup import configure_environment
-from script_generation import generate_script
-
-all_perf_test_configurations = get_all_perf_test_configurations()
-all_perf_test_configurations_descriptions = \
-    [config.__repr__().replace(' ', '').replace('(', '[').replace(')', ']')
-     for config in all_perf_test_configurations]
+from orchestration import AzureMLScriptJob, AzureMLShardJob, LocalScriptJob, LocalShardJob, \
+    Orchestrator
+from script_generation import PHASES, RESOURCE_SAMPLING_METRIC_SUFFIXES, \
+    generate_import_time_script, generate_script, get_measurement_options
+from sharding import AzureMLShardBackend, LocalShardBackend, get_cost_estimates, pack_shards
 
 SCRIPT_DIRECTORY = os.path.join('perf', 'scripts')
+IMPORT_TIME_SCRIPT_NAME = "import_time.py"
 EXPERIMENT_NAME = "perftest"
+# marks the configurations under which the resource samples of a configuration are stored
+RESOURCE_SAMPLING_TAG = " [resource_sampling]"
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -27,50 +29,210 @@ if not os.path.exists(os.path.join("fairlearn-performance", "perf")):
                     "base directory. Current working directory: {}".format(os.getcwd()))
 
 
-@pytest.mark.parametrize("perf_test_configuration", all_perf_test_configurations,
-                         ids=all_perf_test_configurations_descriptions)
-def test_perf(perf_test_configuration, workspace, request, wheel_file):
+def pytest_generate_tests(metafunc):
+    if "perf_test_configuration" in metafunc.fixturenames:
+        perf_test_configurations = get_all_perf_test_configurations(
+            include_scalability_sweep=metafunc.config.getoption("--scalability-sweep"),
+            hyperparameter_sampling=metafunc.config.getoption("--hyperparameter-sweep"),
+            hyperparameter_samples=metafunc.config.getoption("--hyperparameter-samples"),
+            thread_counts=metafunc.config.getoption("--thread-counts"))
+        perf_test_configurations_descriptions = \
+            [config.__repr__().replace(' ', '').replace('(', '[').replace(')', ']')
+             for config in perf_test_configurations]
+        metafunc.parametrize("perf_test_configuration", perf_test_configurations,
+                             ids=perf_test_configurations_descriptions)
+
+
+def generate_selected_scripts(request, workspace):
+    """Generate the scripts for all selected test cases and return a dictionary from test
+    case name to the script name and the configuration.
+    """
+    scripts = {}
+    for item in request.session.items:
+        # older versions of pytest only set originalname for parametrized tests
+        test_name = getattr(item, "originalname", None) or item.name
+        if test_name == test_import_time.__name__:
+            import_time_runs = request.config.getoption("--import-time-runs")
+            if not import_time_runs:
+                continue
+            generate_import_time_script(request, IMPORT_TIME_SCRIPT_NAME, SCRIPT_DIRECTORY,
+                                        workspace)
+            scripts[item.name] = (IMPORT_TIME_SCRIPT_NAME,
+                                  ImportTimeConfiguration(import_time_runs))
+        elif test_name == test_perf.__name__:
+            perf_test_configuration = item.callspec.params["perf_test_configuration"]
+            script_name = determine_script_name(item.name)
+            generate_script(request, perf_test_configuration, script_name, SCRIPT_DIRECTORY,
+                            workspace)
+            scripts[item.name] = (script_name, perf_test_configuration)
+    return scripts
+
+
+def get_shards(request, scripts, results_store):
+    """Pack the scripts into shards balanced by their last recorded execution times."""
+    configurations_by_script_name = {script_name: repr(perf_test_configuration)
+                                     for script_name, perf_test_configuration
+                                     in scripts.values()}
+    return pack_shards(list(configurations_by_script_name),
+                       request.config.getoption("--shards"),
+                       get_cost_estimates(results_store, configurations_by_script_name))
+
+
+def get_run_config(workspace, wheel_file):
+    from azureml.core import RunConfiguration
+
+    compute_target = workspace.compute_targets['cpu-cluster']
+    run_config = RunConfiguration()
+    run_config.target = compute_target
+
+    environment = configure_environment(workspace, wheel_file=wheel_file,
+                                        requirements_file=os.path.join("fairlearn", "requirements.txt"))
+    run_config.environment = environment
+    environment.register(workspace=workspace)
+    return run_config
+
+
+@pytest.fixture(scope="module")
+def local_runs(request, workspace, local_execution_engine, results_store):
+    """Generate the scripts for all selected test cases, submit them to the local execution
+    engine, where they run in parallel on the engine's workers, and wait for all of them.
+    Returns a dictionary from test case name to `ScriptResult`. With --shards the scripts are
+    packed into shards that each run sequentially on one worker.
+    """
+    if workspace:
+        return None
+
+    scripts = generate_selected_scripts(request, workspace)
+    if request.config.getoption("--shards"):
+        backend = LocalShardBackend(local_execution_engine)
+        jobs = [LocalShardJob(backend, shard, SCRIPT_DIRECTORY)
+                for shard in get_shards(request, scripts, results_store)]
+    else:
+        jobs = [LocalScriptJob(local_execution_engine, SCRIPT_DIRECTORY, script_name)
+                for script_name, _ in scripts.values()]
+
+    # one job per worker, so that --run-timeout doesn't count the time in the engine's queue
+    orchestrator = Orchestrator(max_concurrent_jobs=local_execution_engine.workers, retries=0,
+                                timeout=request.config.getoption("--run-timeout"),
+                                poll_interval=1)
+    script_results, _ = orchestrator.run(jobs)
+    return {test_case_name: script_results[script_name]
+            for test_case_name, (script_name, _) in scripts.items()}
+
+
+@pytest.fixture(scope="module")
+def remote_runs(request, workspace, wheel_file, results_store):
+    """Generate the scripts for all selected test cases, submit them to Azure ML with at most
+    --max-concurrent-runs runs at a time and wait for all of them, retrying runs that fail or
+    exceed --run-timeout. Returns a dictionary from test case name to `ScriptResult`. With
+    --shards every run executes a whole shard of scripts.
+    """
+    if not workspace:
+        return None
+
+    from azureml.core import Experiment, ScriptRunConfig
+
+    scripts = generate_selected_scripts(request, workspace)
+    experiment = Experiment(workspace=workspace, name=EXPERIMENT_NAME)
+    run_config = get_run_config(workspace, wheel_file)
+    if request.config.getoption("--shards"):
+        backend = AzureMLShardBackend(experiment, run_config)
+        jobs = [AzureMLShardJob(backend, shard, SCRIPT_DIRECTORY)
+                for shard in get_shards(request, scripts, results_store)]
+    else:
+        jobs = []
+        for script_name, perf_test_configuration in scripts.values():
+            script_run_config = ScriptRunConfig(source_directory=SCRIPT_DIRECTORY,
+                                                script=script_name,
+                                                run_config=run_config)
+            tags = {key: str(value) for key, value in perf_test_configuration.__dict__.items()}
+            jobs.append(AzureMLScriptJob(experiment, script_run_config, script_name, tags))
+
+    orchestrator = Orchestrator(max_concurrent_jobs=request.config.getoption(
+                                    "--max-concurrent-runs"),
+                                timeout=request.config.getoption("--run-timeout"),
+                                retries=request.config.getoption("--run-retries"))
+    script_results, job_records = orchestrator.run(jobs)
+    for job_record in job_records:
+        print(job_record)
+    return {test_case_name: script_results[script_name]
+            for test_case_name, (script_name, _) in scripts.items()}
+
+
+def test_perf(perf_test_configuration, workspace, request, wheel_file, local_runs, remote_runs,
+              results_store, fairlearn_commit, budgets):
     print(f"Starting with test case {request.node.name}")
+    script_result = get_script_result(request, workspace, local_runs, remote_runs)
 
-    script_name = determine_script_name(request.node.name)
-    generate_script(request, perf_test_configuration, script_name, SCRIPT_DIRECTORY, workspace)
+    measurement_options = get_measurement_options(
+        request, determine_script_name(request.node.name), workspace)
+    if measurement_options.resource_sampling_interval:
+        # the resource usage is kept apart from the configuration's timings
+        record_resource_samples(request, perf_test_configuration, script_result, results_store,
+                                fairlearn_commit)
+    if measurement_options.perturbs_timings:
+        # profiled runs are for investigating, their inflated times would skew the history
+        print(f"completed run without recording its timings: {request.node.name}")
+        return
+
+    record_script_result(request, perf_test_configuration, script_result, results_store,
+                         fairlearn_commit, budgets)
+
+
+def test_import_time(workspace, request, wheel_file, local_runs, remote_runs, results_store,
+                     fairlearn_commit, budgets):
+    import_time_runs = request.config.getoption("--import-time-runs")
+    if not import_time_runs:
+        pytest.skip("the import time is only measured with --import-time-runs")
+
+    print(f"Starting with test case {request.node.name}")
+    script_result = get_script_result(request, workspace, local_runs, remote_runs)
+    record_script_result(request, ImportTimeConfiguration(import_time_runs), script_result,
+                         results_store, fairlearn_commit, budgets)
 
-    if workspace:
-        # run remotely on Azure ML Cluster
-        from azureml.core import Experiment, RunConfiguration, ScriptRunConfig
-
-        experiment = Experiment(workspace=workspace, name=EXPERIMENT_NAME)
-        compute_target = workspace.compute_targets['cpu-cluster']
-        run_config = RunConfiguration()
-        run_config.target = compute_target
-
-        environment = configure_environment(workspace, wheel_file=wheel_file,
-                                            requirements_file=os.path.join("fairlearn", "requirements.txt"))
-        run_config.environment = environment
-        environment.register(workspace=workspace)
-        script_run_config = ScriptRunConfig(source_directory=SCRIPT_DIRECTORY,
-                                            script=script_name,
-                                            run_config=run_config)
-        print("submitting run")
-        experiment.submit(config=script_run_config, tags=perf_test_configuration.__dict__)
-        print("submitted run")
 
+def get_script_result(request, workspace, local_runs, remote_runs):
+    if workspace:
+        # the script already ran on the Azure ML cluster as part of the orchestrated runs
+        script_result = remote_runs[request.node.name]
     else:
-        # run locally
-        print(f"starting local run: {request.node.name}")
-        cmd = ["python", f"{SCRIPT_DIRECTORY}/{script_name}"]
-        popen = subprocess.Popen(cmd, stdout=subprocess.PIPE, universal_newlines=True)
-        for stdout_line in iter(popen.stdout.readline, ""):
-            print(stdout_line, end="")
-        popen.stdout.close()
-        return_code = popen.wait()
-        if return_code:
-            raise subprocess.CalledProcessError(return_code, cmd)
-        print(f"completed local run: {request.node.name}")
+        # the script already ran on the local execution engine as part of the orchestrated runs
+        script_result = local_runs[request.node.name]
+        print(script_result.output, end="")
+
+    if not script_result.succeeded:
+        raise Exception("Run {} failed:\n{}"
+                        .format(script_result.script_path, script_result.error))
+    return script_result
+
+
+def record_resource_samples(request, configuration, script_result, results_store,
+                            fairlearn_commit):
+    # under a tagged configuration the resource usage neither mixes with the configuration's
+    # timings nor is checked against its budgets or used for its cost estimates
+    resource_sampling_metrics = {
+        metric: value for metric, value in script_result.metrics.items()
+        if any(metric.endswith(suffix) for suffix in RESOURCE_SAMPLING_METRIC_SUFFIXES)}
+    results_store.record(fairlearn_commit, repr(configuration) + RESOURCE_SAMPLING_TAG,
+                         resource_sampling_metrics, PHASES)
+    print(f"recorded resource samples: {request.node.name}")
+
+
+def record_script_result(request, configuration, script_result, results_store,
+                         fairlearn_commit, budgets):
+    results_store.record(fairlearn_commit, repr(configuration), script_result.metrics, PHASES)
+    print(f"completed run: {request.node.name}")
+
+    if budgets is not None:
+        violations = budgets.check(repr(configuration), script_result.metrics,
+                                   request.config.getoption("--budget-tolerance"))
+        if violations:
+            raise Exception("Performance budgets exceeded:\n{}"
+                            .format("\n".join(repr(violation) for violation in violations)))
 
 
 def determine_script_name(test_case_name):
-    hashed_test_case_name = hash(test_case_name)
-    hashed_test_case_name = hashed_test_case_name if hashed_test_case_name >= 0 \
-        else -1 * hashed_test_case_name
-    return "{}.py".format(str(hashed_test_case_name))
+    # unlike hash(), the digest is the same in every interpreter, so the profile and resource
+    # sample directories, which are named after the script, are stable across sessions
+    hashed_test_case_name = hashlib.sha256(test_case_name.encode("utf-8")).hexdigest()[:16]
+    return "{}.py".format(hashed_test_case_name)
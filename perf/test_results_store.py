@@ -0,0 +1,80 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from results_store import ResultsStore, detect_regressions
+
+BASELINE = "baseline"
+CANDIDATE = "candidate"
+CONFIGURATION = "[dataset: adult_uci]"
+
+
+@pytest.fixture
+def results_store():
+    results_store = ResultsStore(":memory:")
+    yield results_store
+    results_store.close()
+
+
+def record_runs(results_store, commit, metric, values):
+    for value in values:
+        results_store.record(commit, CONFIGURATION, {metric: value}, ["mitigation"])
+
+
+def test_detect_regressions_significant_slowdown(results_store):
+    record_runs(results_store, BASELINE, "mitigation_execution_time", [1.0, 1.01, 0.99, 1.02])
+    record_runs(results_store, CANDIDATE, "mitigation_execution_time", [1.5, 1.51, 1.49, 1.52])
+
+    regressions = detect_regressions(results_store, BASELINE, CANDIDATE)
+
+    assert len(regressions) == 1
+    assert regressions[0].configuration == CONFIGURATION
+    assert regressions[0].metric == "mitigation_execution_time"
+    assert regressions[0].relative_change == pytest.approx(0.5, abs=0.01)
+    assert regressions[0].p_value < 0.05
+
+
+def test_detect_regressions_ignores_changes_within_tolerance(results_store):
+    record_runs(results_store, BASELINE, "mitigation_execution_time", [1.0, 1.01, 0.99, 1.02])
+    record_runs(results_store, CANDIDATE, "mitigation_execution_time", [1.03, 1.04, 1.02, 1.05])
+
+    assert detect_regressions(results_store, BASELINE, CANDIDATE, tolerance=0.05) == []
+
+
+def test_detect_regressions_ignores_improvements(results_store):
+    record_runs(results_store, BASELINE, "mitigation_execution_time", [1.5, 1.51, 1.49, 1.52])
+    record_runs(results_store, CANDIDATE, "mitigation_execution_time", [1.0, 1.01, 0.99, 1.02])
+
+    assert detect_regressions(results_store, BASELINE, CANDIDATE) == []
+
+
+def test_detect_regressions_ignores_metrics_where_higher_is_better(results_store):
+    record_runs(results_store, BASELINE, "predict_throughput_batch_1", [100, 101, 99, 102])
+    record_runs(results_store, CANDIDATE, "predict_throughput_batch_1", [200, 201, 199, 202])
+
+    assert detect_regressions(results_store, BASELINE, CANDIDATE) == []
+
+
+def test_detect_regressions_without_enough_samples_checks_tolerance_only(results_store):
+    record_runs(results_store, BASELINE, "mitigation_peak_rss", [100])
+    record_runs(results_store, CANDIDATE, "mitigation_peak_rss", [200])
+
+    regressions = detect_regressions(results_store, BASELINE, CANDIDATE)
+
+    assert len(regressions) == 1
+    assert regressions[0].p_value is None
+
+
+def test_detect_regressions_uses_the_individual_trials(results_store):
+    # a single run per commit, but with repeated trials that are logged as a list
+    for commit, trial_times in [(BASELINE, [1.0, 1.01, 0.99, 1.02]),
+                                (CANDIDATE, [1.5, 1.51, 1.49, 1.52])]:
+        results_store.record(commit, CONFIGURATION,
+                             {"mitigation_execution_time": sorted(trial_times)[1],
+                              "mitigation_execution_times": trial_times}, ["mitigation"])
+
+    regressions = detect_regressions(results_store, BASELINE, CANDIDATE)
+
+    assert [regression.metric for regression in regressions] == ["mitigation_execution_time"]
+    assert regressions[0].p_value is not None
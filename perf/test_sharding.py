@@ -0,0 +1,70 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from results_store import ResultsStore
+from sharding import get_cost_estimates, pack_shards
+
+
+def get_shard_costs(shards, costs):
+    return sorted(sum(costs[script_name] for script_name in shard.script_names)
+                  for shard in shards)
+
+
+def test_pack_shards_balances_costs():
+    costs = {"a.py": 7, "b.py": 5, "c.py": 4, "d.py": 3, "e.py": 3, "f.py": 2}
+
+    shards = pack_shards(list(costs), 2, costs)
+
+    assert [shard.index for shard in shards] == [0, 1]
+    assert get_shard_costs(shards, costs) == [12, 12]
+
+
+def test_pack_shards_assigns_every_script_exactly_once():
+    script_names = ["{}.py".format(index) for index in range(10)]
+
+    shards = pack_shards(script_names, 3)
+
+    assert sorted(script_name for shard in shards for script_name in shard.script_names) == \
+        sorted(script_names)
+    assert sorted(len(shard.script_names) for shard in shards) == [3, 3, 4]
+
+
+def test_pack_shards_creates_no_empty_shards():
+    shards = pack_shards(["a.py", "b.py"], 5)
+
+    assert [len(shard.script_names) for shard in shards] == [1, 1]
+
+
+def test_pack_shards_estimates_unknown_costs_with_the_median():
+    costs = {"a.py": 1, "b.py": 10, "c.py": 100}
+
+    shards = pack_shards(["a.py", "b.py", "c.py", "unknown.py"], 2, costs)
+
+    # the unknown script costs 10 like the median, so it's packed with a.py and b.py
+    assert sorted(sorted(shard.script_names) for shard in shards) == \
+        [["a.py", "b.py", "unknown.py"], ["c.py"]]
+
+
+def test_pack_shards_requires_a_shard():
+    with pytest.raises(ValueError):
+        pack_shards(["a.py"], 0)
+
+
+def test_get_cost_estimates_sums_the_phase_totals():
+    results_store = ResultsStore(":memory:")
+    results_store.record("commit", "[configuration]", {
+        "estimator_fit_execution_time": 1,
+        "mitigation_execution_time": 10,
+        "streaming_predict_chunk_1000_execution_time": 2,
+        # part of the mitigation time
+        "oracle_calls_sum_execution_time": 8,
+        "mitigation_estimator_fit_median_execution_time": 0.5,
+    })
+
+    costs = get_cost_estimates(results_store, {"a.py": "[configuration]",
+                                               "b.py": "[unknown configuration]"})
+    results_store.close()
+
+    assert costs == {"a.py": 13}
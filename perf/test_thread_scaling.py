@@ -0,0 +1,41 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from results_store import ResultsStore
+from thread_scaling import get_scaling_curves
+
+CONFIGURATION = "[dataset: adult_uci, estimator: RandomForestClassifier(n_jobs={0}), " \
+    "n_threads: {0}]"
+
+
+def record_thread_counts(results_store, execution_times, available_cores):
+    for n_threads, execution_time in execution_times.items():
+        results_store.record("commit", CONFIGURATION.format(n_threads),
+                             {"mitigation_execution_time": execution_time,
+                              "n_threads": n_threads, "available_cores": available_cores})
+
+
+def test_get_scaling_curves_relative_to_the_smallest_thread_count():
+    results_store = ResultsStore(":memory:")
+    record_thread_counts(results_store, {1: 8.0, 2: 5.0, 4: 2.5}, 4)
+
+    curves = get_scaling_curves(results_store, "commit")
+    results_store.close()
+
+    assert list(curves) == [("[dataset: adult_uci, estimator: RandomForestClassifier("
+                             "n_jobs=n_threads)]", "mitigation_execution_time")]
+    curve = next(iter(curves.values()))
+    assert [(point.n_threads, point.speedup, point.efficiency) for point in curve] == \
+        [(1, 1.0, 1.0), (2, 1.6, 0.8), (4, 3.2, 0.8)]
+    assert not any(point.oversubscribed for point in curve)
+
+
+def test_get_scaling_curves_marks_oversubscribed_thread_counts():
+    results_store = ResultsStore(":memory:")
+    record_thread_counts(results_store, {1: 8.0, 2: 5.0, 4: 5.0}, 2)
+
+    curve, = get_scaling_curves(results_store, "commit").values()
+    results_store.close()
+
+    assert [point.oversubscribed for point in curve] == [False, False, True]
+    assert "oversubscribed, 2 cores" in repr(curve[-1])
@@ -0,0 +1,91 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+import pytest
+
+from timed_execution import TimedExecution
+
+
+class FakeRun:
+    def __init__(self):
+        self.metrics = {}
+
+    def log(self, name, value):
+        self.metrics[name] = value
+
+    def log_list(self, name, values):
+        self.metrics[name] = values
+
+
+def run_script(script_lines):
+    # the generated lines rely on the helpers of timing_statistics_script.txt, which are
+    # inlined into the generated scripts, so they're loaded the same way
+    script_globals = {"run": FakeRun()}
+    with open(os.path.join(os.path.dirname(__file__), "timing_statistics_script.txt"), 'r') \
+            as script_file:
+        exec(script_file.read(), script_globals)
+    exec(compile("\n".join(script_lines), "<generated>", "exec"), script_globals)
+    return script_globals
+
+
+def test_timed_execution_repeats_the_body_for_warmup_iterations_and_trials():
+    script_lines = ["calls = []"]
+    with TimedExecution("mitigation", script_lines, warmup_iterations=2, trials=3):
+        script_lines.append("calls.append(mitigation_trial)")
+
+    script_globals = run_script(script_lines)
+
+    assert script_globals["calls"] == [0, 1, 2, 3, 4]
+    metrics = script_globals["run"].metrics
+    # only the trials are measured
+    assert len(metrics["mitigation_execution_times"]) == 3
+    assert len(metrics["mitigation_process_times"]) == 3
+    assert metrics["mitigation_execution_time"] == metrics["mitigation_execution_time_median"]
+    assert set(metrics) >= {"mitigation_execution_time_min", "mitigation_execution_time_iqr",
+                            "mitigation_execution_time_median_ci95"}
+
+
+def test_timed_execution_with_a_single_trial_logs_no_statistics():
+    script_lines = []
+    with TimedExecution("predict", script_lines):
+        script_lines.append("prediction = 1")
+
+    metrics = run_script(script_lines)["run"].metrics
+
+    assert sorted(metrics) == ["predict_execution_time", "predict_process_time"]
+    assert metrics["predict_execution_time"] >= 0
+
+
+def test_timed_execution_indents_nested_blocks_and_blank_lines():
+    script_lines = ["values = []"]
+    with TimedExecution("estimator_fit", script_lines, trials=2):
+        script_lines.append("for value in range(3):")
+        script_lines.append("    if value % 2 == 0:")
+        script_lines.append("        values.append(value)")
+        script_lines.append("")
+        script_lines.append("values.append(-1)")
+
+    loop_start = script_lines.index("for estimator_fit_trial in range(2):")
+    assert "    for value in range(3):" in script_lines[loop_start:]
+    assert "            values.append(value)" in script_lines[loop_start:]
+    # blank lines stay blank instead of carrying trailing whitespace
+    assert "" in script_lines[loop_start:]
+
+    assert run_script(script_lines)["values"] == [0, 2, -1, 0, 2, -1]
+
+
+def test_timed_execution_announces_the_procedure_outside_of_the_loop():
+    script_lines = []
+    with TimedExecution("mitigation", script_lines, trials=2):
+        script_lines.append("pass")
+
+    assert script_lines[0] == 'print("Starting mitigation")'
+    assert script_lines[-1] == 'print("Finished mitigation")'
+
+
+@pytest.mark.parametrize("warmup_iterations, trials", [(-1, 1), (0, 0)])
+def test_timed_execution_validates_the_iterations(warmup_iterations, trials):
+    with pytest.raises(ValueError):
+        TimedExecution("mitigation", [], warmup_iterations=warmup_iterations, trials=trials)
@@ -0,0 +1,120 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+""" Strong-scaling report of the thread scaling configurations, i.e., the speedup and parallel
+efficiency of every phase when the same configuration runs with more threads.
+"""
+
+import argparse
+import os
+import re
+import sys
+from statistics import median
+
+from results_store import ResultsStore
+from script_generation import PHASES
+
+_N_THREADS_PATTERN = re.compile(r", n_threads: (\d+)\]$")
+# the random forest's n_jobs follows the thread count, so it's removed from the description
+_N_JOBS_PATTERN = re.compile(r"n_jobs=\d+")
+# logged by every thread scaling run
+_AVAILABLE_CORES = "available_cores"
+
+
+class ScalingPoint:
+    """ScalingPoint is the time of a phase with `n_threads` threads, its speedup over the
+    smallest measured thread count and the resulting parallel efficiency. `available_cores`
+    is the number of cores that the run could use, if it was logged.
+    """
+
+    def __init__(self, n_threads, execution_time, speedup, efficiency, available_cores=None):
+        self.n_threads = n_threads
+        self.execution_time = execution_time
+        self.speedup = speedup
+        self.efficiency = efficiency
+        self.available_cores = available_cores
+
+    @property
+    def oversubscribed(self):
+        """Whether the threads had to share cores, so the point shows contention rather than
+        scaling.
+        """
+        return self.available_cores is not None and self.n_threads > self.available_cores
+
+    def __repr__(self):
+        description = "{:>4} threads: {:.3f}s, speedup {:.2f}, efficiency {:.0%}".format(
+            self.n_threads, self.execution_time, self.speedup, self.efficiency)
+        if self.oversubscribed:
+            description += " (oversubscribed, {} cores)".format(self.available_cores)
+        return description
+
+
+def get_scaling_curves(results_store, fairlearn_commit, metric_suffix="_execution_time"):
+    """Return a dictionary from (configuration without thread count, metric) to the list of
+    `ScalingPoint` objects ordered by thread count for the metrics of the phases, e.g.,
+    `mitigation_execution_time`. Efficiencies are relative to the smallest measured thread
+    count, e.g., 1.0 means perfect linear scaling.
+    """
+    phase_metrics = [phase + metric_suffix for phase in PHASES]
+    times = {}
+    available_cores = {}
+    for (configuration, metric), values in results_store.get_values(
+            fairlearn_commit, metric_suffixes=[metric_suffix, _AVAILABLE_CORES]).items():
+        match = _N_THREADS_PATTERN.search(configuration)
+        if match is not None and metric == _AVAILABLE_CORES:
+            # a point is oversubscribed if any of its runs was
+            available_cores[configuration] = int(min(values))
+        if match is None or metric not in phase_metrics:
+            continue
+        base_configuration = _N_JOBS_PATTERN.sub("n_jobs=n_threads",
+                                                 configuration[:match.start()] + "]")
+        times.setdefault((base_configuration, metric), {})[int(match.group(1))] = \
+            (median(values), configuration)
+
+    curves = {}
+    for key, times_by_n_threads in times.items():
+        base_n_threads = min(times_by_n_threads)
+        base_time, _ = times_by_n_threads[base_n_threads]
+        curve = []
+        for n_threads in sorted(times_by_n_threads):
+            execution_time, configuration = times_by_n_threads[n_threads]
+            speedup = base_time / execution_time
+            curve.append(ScalingPoint(n_threads, execution_time, speedup,
+                                      speedup * base_n_threads / n_threads,
+                                      available_cores.get(configuration)))
+        curves[key] = curve
+    return curves
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Report the strong-scaling efficiency of the thread scaling "
+                    "configurations from the locally stored performance test results.")
+    parser.add_argument("--database", default=os.path.join("perf", "results.sqlite"))
+    parser.add_argument("--commit", help="fairlearn commit; defaults to the most recently "
+                                         "recorded commit")
+    parser.add_argument("--metric-suffix", default="_execution_time")
+    args = parser.parse_args(args)
+
+    results_store = ResultsStore(args.database)
+    commits = results_store.get_commits()
+    commit = args.commit or (commits[-1] if commits else None)
+    if commit is None:
+        print("No results found in {}.".format(args.database))
+        return 2
+
+    curves = get_scaling_curves(results_store, commit, args.metric_suffix)
+    if not curves:
+        print("No thread scaling results found for fairlearn commit {}.".format(commit))
+        return 2
+
+    print("Strong scaling of fairlearn commit {}".format(commit))
+    for (configuration, metric), curve in sorted(curves.items()):
+        print("{} {}".format(configuration, metric))
+        for scaling_point in curve:
+            print("    {}".format(scaling_point))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
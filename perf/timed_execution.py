@@ -2,48 +2,113 @@
 # Licensed under the MIT License.
 
 _START_TIME = "_start_time"
+_START_PROCESS_TIME = "_start_process_time"
 _EXECUTION_TIME = "_execution_time"
+_PROCESS_TIME = "_process_time"
+_TRIAL = "_trial"
+_TRIAL_EXECUTION_TIME = "_trial_execution_time"
+_TRIAL_PROCESS_TIME = "_trial_process_time"
+_INDENTATION = "    "
 
 
 class TimedExecution:
     """TimedExecution generates the python script to measure execution times.
 
-    Specifically, it measures the time that passes from the start to the end of the
-    with-statement that TimedExecution is used for.
+    Specifically, it measures the wall-clock time (`perf_counter`) and the CPU time of the
+    process (`process_time`) that pass from the start to the end of the with-statement that
+    TimedExecution is used for. The code within the with-statement is run
+    `warmup_iterations` times without being measured and then `trials` times with
+    measurements. The median over the trials is logged as the execution time and process
+    time, and with more than one trial the individual measurements and their summary
+    statistics are logged as well.
 
-    TimedExecution writes the code under the assumption that an Azure Machine Learning
-    `azureml-core:azureml.core.Run` object called `run` exists and logs the metric
+    TimedExecution writes the code under the assumption that the helper functions from
+    timing_statistics_script.txt and an Azure Machine Learning
+    `azureml-core:azureml.core.Run` object called `run` exist and logs the metric
     under that run.
 
     script_lines = []
     script_lines.append('from azureml.core.run import Run')
-    script_lines.append()"run = Run.get_context()")
-    with TimedExecution("special_period", script_lines):
+    script_lines.append("run = Run.get_context()")
+    with TimedExecution("special_period", script_lines, warmup_iterations=1, trials=5):
     #     do something
 
     The execution time within the with-statement is automatically tracked and saved to the
-    run as a metric.
+    run as a metric. Since the code within the with-statement is repeated it needs to be
+    self-contained, i.e., every trial needs to create the objects it modifies.
     """
 
-    def __init__(self, procedure_name, script_lines):
+    def __init__(self, procedure_name, script_lines, warmup_iterations=0, trials=1):
         # The procedure name is used in variable names to make them unique,
         # so it cannot contain whitespace.
         assert " " not in procedure_name
+        if warmup_iterations < 0:
+            raise ValueError("The number of warmup iterations can't be negative.")
+        if trials < 1:
+            raise ValueError("At least one trial is required.")
 
         self.procedure_name = procedure_name
         self.script_lines = script_lines
+        self.warmup_iterations = warmup_iterations
+        self.trials = trials
         self.script_lines.append('print("Starting {}")'.format(self.procedure_name))
 
     def __enter__(self):
-        self.script_lines.append("{} = time()".format(self.procedure_name + _START_TIME))
+        self._body_start = len(self.script_lines)
 
     def __exit__(self, type, value, traceback):  # noqa: A002
+        # the code inside the with-statement is moved into the trial loop
+        body_lines = self.script_lines[self._body_start:]
+        del self.script_lines[self._body_start:]
+
         execution_time_variable_name = self.procedure_name + _EXECUTION_TIME
+        process_time_variable_name = self.procedure_name + _PROCESS_TIME
         start_time_variable_name = self.procedure_name + _START_TIME
-        self.script_lines.append("{} = time() - {}"
-                                 .format(execution_time_variable_name, start_time_variable_name))
+        start_process_time_variable_name = self.procedure_name + _START_PROCESS_TIME
+        trial_variable_name = self.procedure_name + _TRIAL
+        trial_execution_time_variable_name = self.procedure_name + _TRIAL_EXECUTION_TIME
+        trial_process_time_variable_name = self.procedure_name + _TRIAL_PROCESS_TIME
+        execution_times_variable_name = execution_time_variable_name + "s"
+        process_times_variable_name = process_time_variable_name + "s"
+
+        self.script_lines.append("{} = []".format(execution_times_variable_name))
+        self.script_lines.append("{} = []".format(process_times_variable_name))
+        self.script_lines.append("for {} in range({}):"
+                                 .format(trial_variable_name,
+                                         self.warmup_iterations + self.trials))
+        loop_lines = []
+        loop_lines.append("{} = process_time()".format(start_process_time_variable_name))
+        loop_lines.append("{} = perf_counter()".format(start_time_variable_name))
+        loop_lines.extend(body_lines)
+        loop_lines.append("{} = perf_counter() - {}"
+                          .format(trial_execution_time_variable_name, start_time_variable_name))
+        loop_lines.append("{} = process_time() - {}"
+                          .format(trial_process_time_variable_name,
+                                  start_process_time_variable_name))
+        loop_lines.append("if {} >= {}:".format(trial_variable_name, self.warmup_iterations))
+        loop_lines.append(_INDENTATION + "{}.append({})"
+                          .format(execution_times_variable_name,
+                                  trial_execution_time_variable_name))
+        loop_lines.append(_INDENTATION + "{}.append({})"
+                          .format(process_times_variable_name,
+                                  trial_process_time_variable_name))
+        self.script_lines.extend(_INDENTATION + line if line else line for line in loop_lines)
+
+        self.script_lines.append("{} = median({})"
+                                 .format(execution_time_variable_name,
+                                         execution_times_variable_name))
+        self.script_lines.append("{} = median({})"
+                                 .format(process_time_variable_name,
+                                         process_times_variable_name))
         self.script_lines.append("run.log('{0}', {0})"
                                  .format(execution_time_variable_name))
+        self.script_lines.append("run.log('{0}', {0})"
+                                 .format(process_time_variable_name))
+        if self.trials > 1:
+            self.script_lines.append("log_timing_statistics('{}', {}, {})"
+                                     .format(self.procedure_name,
+                                             execution_times_variable_name,
+                                             process_times_variable_name))
         self.script_lines.append('print("{} time taken: {{}}s".format({}))'
                                  .format(self.procedure_name, execution_time_variable_name))
         self.script_lines.append('print("Finished {}")'.format(self.procedure_name))